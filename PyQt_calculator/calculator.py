@@ -1,7 +1,9 @@
 #create a basic window
 import sys
-from PyQt6.QtWidgets import QWidget,QApplication,QGridLayout,QLabel,QPushButton
+from PyQt6.QtWidgets import QWidget,QApplication,QGridLayout,QLabel,QPushButton,QComboBox
 from PyQt6.QtCore import Qt
+
+from number_engine import MODES, ChainCalculator
 class Window(QWidget):
     def __init__(self):
         super().__init__()
@@ -35,6 +37,12 @@ class Window(QWidget):
         self.equals_button = QPushButton("=")
         self.equals_button.clicked.connect(self.calculate)
         self.clear_button = QPushButton("C")
+        self.clear_button.clicked.connect(self.clear)
+
+        # Number type used for the calculation: float, decimal or fraction
+        self.mode_box = QComboBox()
+        self.mode_box.addItems(MODES)
+        self.mode_box.currentTextChanged.connect(self.change_mode)
         
         
         #Create a layout and add it to the window
@@ -61,61 +69,40 @@ class Window(QWidget):
         #Add = and C button
         layout.addWidget(self.clear_button,4,2)
         layout.addWidget(self.equals_button,4,1)
+        layout.addWidget(self.mode_box,5,0,1,4)
               
         self.setLayout(layout)
         
         
-        # Create three variables, current input, previous input and current operator
-        self.current_input = "0"
-        self.current_operator =""
-        self.previous_operator=""
+        # The engine keeps the operands as numbers, the display only gets text
+        self.engine = ChainCalculator("float")
         
         #create a method for number button clicked
     def number_button_clicked(self):
         # get the text from the button being clicked
         digit = self.sender().text()
-            
-        if self.current_input=="0":
-            self.current_input=digit
-        else:
-            self.current_input += digit
-        self.display.setText(self.current_input)
+        self.engine.press_digit(digit)
+        self.display.setText(self.engine.text())
             
             
     def operator_button_clicked(self):
         # get the text from operator button
         operator = self.sender().text()
-        if self.current_operator=="":
-            self.previous_input = self.current_input
-            self.current_input="0"
-            self.current_operator = operator 
-            print("current operator empty")
-        else:
-            # call the calculate method here
-            print("current operator NOT empty")
-            self.calculate()
-            #Same as above
-            self.previous_input = self.current_input
-            self.current_operator = operator
-            self.current_input = "0"        
+        # a pending operator is applied first, so 9 - 4 * 2 chains as (9-4)*2
+        self.engine.press_operator(operator)
+        self.display.setText(self.engine.text())
     
     def calculate(self):
-        if self.current_operator=="+":
-            result = str(float(self.previous_input)+float(self.current_input))
-        elif self.current_operator=="-":
-            result = str(float(self.previous_input)-float(self.current_input))
-        elif self.current_operator=="*":
-            result = str(float(self.previous_input)*float(self.current_input))
-        elif self.current_operator=="/":
-            if self.current_input=="0":
-                result="Error"
-            else:
-                result = str(float(self.previous_input)/float(self.current_input))
-        else:
-            result=self.current_input
-        self.display.setText(result)
-        self.current_input=result
-        self.current_operator=""
+        self.engine.equals()
+        self.display.setText(self.engine.text())
+
+    def clear(self):
+        self.engine.clear()
+        self.display.setText(self.engine.text())
+
+    def change_mode(self, mode):
+        self.engine.set_mode(mode)
+        self.display.setText(self.engine.text())
  
 app = QApplication(sys.argv)
 window = Window()
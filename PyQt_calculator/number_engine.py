@@ -0,0 +1,194 @@
+"""
+Number engine for the PyQt calculator.
+
+Operands stay numbers through a chain of operations (9 - 4 * 2 = ...):
+the digits typed are parsed once when an operator is pressed and the
+running result is only turned into text when text() is asked for the
+display.
+
+Three number types can be selected:
+
+- "float":    fast, binary floating point (0.1 + 0.2 != 0.3)
+- "decimal":  decimal.Decimal with a configurable precision
+- "fraction": fractions.Fraction, exact rational arithmetic
+
+Run this file for a chained-operation benchmark of each mode against
+the old parse/format-every-step approach.
+"""
+import decimal
+from decimal import Decimal
+from fractions import Fraction
+from operator import add, mul, sub, truediv
+
+# The operator buttons; division by zero raises ZeroDivisionError in every mode
+OPERATORS = {"+": add, "-": sub, "*": mul, "/": truediv}
+
+MODES = {"float": float, "decimal": Decimal, "fraction": Fraction}
+
+
+class ChainCalculator:
+    """Calculator state driven by press_digit, press_operator and equals"""
+
+    def __init__(self, mode="float", precision=28):
+        self.context = decimal.Context(prec=precision)
+        self._set_number(mode)
+        self.clear()
+
+    def _set_number(self, mode):
+        self.mode = mode
+        self.number = MODES[mode]
+        self.zero = self.number(0)
+
+    def clear(self):
+        self.entry = "0"        # digits typed since the last operator (None: none yet)
+        self.current = self.zero
+        self.previous = None
+        self.operator = ""
+        self.error = False
+
+    def set_mode(self, mode):
+        """Switch number type, converting the values of a chain in progress"""
+        self._set_number(mode)
+        try:
+            self.current = self._convert(self.current)
+            if self.previous is not None:
+                self.previous = self._convert(self.previous)
+        except (ValueError, ArithmeticError):
+            self.clear()
+
+    def _convert(self, value):
+        if isinstance(value, Fraction) and self.number is Decimal:
+            return self.context.divide(Decimal(value.numerator), Decimal(value.denominator))
+        if isinstance(value, float) and self.number is not float:
+            return self.number(repr(value))  # 0.1 stays 0.1, not its binary value
+        return self.number(value)
+
+    def press_digit(self, digit):
+        if self.error:
+            self.clear()
+        if self.entry in (None, "0"):
+            self.entry = digit
+        else:
+            self.entry += digit
+
+    def press_operator(self, operator):
+        """Start a chain, or apply the pending operator and continue it"""
+        if operator not in OPERATORS:
+            raise ValueError(f"unknown operator {operator!r}")
+        self._take_entry()
+        if self.operator:
+            self._apply()
+        self.previous = self.current
+        self.operator = operator
+        self.current = self.zero
+
+    def equals(self):
+        if not self.operator:
+            return  # nothing pending: keep showing the digits as typed ("7", not "7.0")
+        self._take_entry()
+        self._apply()
+        self.previous = None
+
+    def _take_entry(self):
+        # The typed digits are parsed exactly once
+        if self.entry is not None:
+            self.current = self.number(self.entry)
+            self.entry = None
+
+    def _apply(self):
+        function = OPERATORS[self.operator]
+        self.operator = ""
+        try:
+            if self.number is Decimal:
+                with decimal.localcontext(self.context):
+                    self.current = function(self.previous, self.current)
+            else:
+                self.current = function(self.previous, self.current)
+        except ArithmeticError:
+            # division by zero, overflow, invalid Decimal operation
+            self.error = True
+            self.current = self.zero
+
+    def text(self):
+        """Display text (the only place numbers become text)"""
+        if self.error:
+            return "Error"
+        if self.entry is not None:
+            return self.entry
+        if self.operator:
+            return self._format(self.previous)  # running result of the chain
+        return self._format(self.current)
+
+    @staticmethod
+    def _format(value):
+        if isinstance(value, Decimal):
+            # 12.00000000000000000000000000 -> 12, 1E+3 -> 1000
+            value = value.normalize()
+            return "0" if value.is_zero() else format(value, "f")
+        return str(value)
+
+
+class _StringCalculator:
+    """The calculator before this engine: text parsed and formatted every step"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.current_input = "0"
+        self.previous_input = "0"
+        self.current_operator = ""
+
+    def press_digit(self, digit):
+        if self.current_input == "0":
+            self.current_input = digit
+        else:
+            self.current_input += digit
+
+    def press_operator(self, operator):
+        if self.current_operator:
+            self.equals()
+        self.previous_input = self.current_input
+        self.current_operator = operator
+        self.current_input = "0"
+
+    def equals(self):
+        if self.current_operator == "/" and self.current_input == "0":
+            result = "Error"
+        elif self.current_operator:
+            result = str(OPERATORS[self.current_operator](
+                float(self.previous_input), float(self.current_input)))
+        else:
+            result = self.current_input
+        self.current_input = result
+        self.current_operator = ""
+
+    def text(self):
+        return self.current_input
+
+
+def benchmark(chains=2000, length=100):
+    """Chained-operation throughput per mode"""
+    import time
+    # 7 +1 *3 /3 -1 ... should stay 7: shows the rounding of each mode too
+    steps = [("+", "1"), ("*", "3"), ("/", "3"), ("-", "1")] * (length // 4)
+    operations = chains * len(steps)
+
+    calculators = [("old (str/float)", _StringCalculator())]
+    calculators += [(mode, ChainCalculator(mode)) for mode in MODES]
+    for name, calculator in calculators:
+        start = time.perf_counter()
+        for _ in range(chains):
+            calculator.clear()
+            calculator.press_digit("7")
+            for operator, operand in steps:
+                calculator.press_operator(operator)
+                calculator.press_digit(operand)
+            calculator.equals()
+        result = calculator.text()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<16} {operations / elapsed:>12,.0f} ops/sec  result {result}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,149 @@
+"""
+Background database worker for the student management app.
+
+Repository calls run on one worker thread (so writes keep their order)
+and results come back to the Tk thread through a queue polled with
+root.after(). Jobs submitted with a "kind" supersede earlier jobs of the
+same kind: a superseded job is skipped if it hasn't started yet. If it is
+running, it is cancelled through the cancel hook (when one is given) and
+its result is dropped.
+
+    worker = DatabaseWorker(root, on_busy=show_busy, cancel=repo.cancel)
+    worker.submit(repo.search_after, "smith", kind="page", on_done=fill_tree)
+"""
+import itertools
+import queue
+import sys
+import threading
+
+
+class DatabaseWorker:
+    """Runs database calls off the Tk main thread"""
+
+    def __init__(self, root, on_busy=None, on_error=None, cancel=None, poll_ms=16):
+        self.root = root
+        self.on_busy = on_busy
+        self.on_error = on_error
+        # cancel(thread_id) interrupts the call running on the worker thread
+        self.cancel = cancel
+        self.poll_ms = poll_ms
+
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._tickets = itertools.count(1)
+        self._latest = {}   # kind -> ticket of the newest job of that kind
+        self._pending = 0
+        self._polling = False
+        self._closing = False
+        # (ticket, kind) of the job being run; the lock keeps the worker from
+        # moving on to another job while a cancel is being sent
+        self._running = None
+        self._running_lock = threading.Lock()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """Number of jobs submitted but not yet delivered"""
+        return self._pending
+
+    def submit(self, operation, *args, kind=None, on_done=None, on_error=None):
+        """Queue operation(*args) on the worker thread (Tk thread only)
+
+        on_done(result) or on_error(exception) is called back on the Tk
+        thread, unless a newer job of the same kind was submitted since.
+        """
+        ticket = next(self._tickets)
+        if kind is not None:
+            self._latest[kind] = ticket
+            self._cancel_running(lambda running: running[1] == kind)
+        self._pending += 1
+        self._jobs.put((ticket, kind, operation, args,
+                        on_done, on_error or self.on_error))
+        self._busy_changed()
+        self._start_polling()
+        return ticket
+
+    def call_soon(self, callback, *args):
+        """Run callback(*args) on the Tk thread (safe from any thread)"""
+        self._results.put((None, None, callback, args))
+
+    def is_current(self, ticket, kind):
+        return kind is None or self._latest.get(kind) == ticket
+
+    def close(self):
+        """Stop the worker without waiting for it (Tk thread only)
+
+        The running job is cancelled and queued jobs are skipped; closed
+        tells when the worker thread has actually finished.
+        """
+        self._closing = True
+        self._cancel_running(lambda running: True)
+        self._jobs.put(None)
+
+    @property
+    def closed(self):
+        return not self._thread.is_alive()
+
+    def _cancel_running(self, matches):
+        with self._running_lock:
+            if self.cancel is not None and self._running is not None and matches(self._running):
+                self.cancel(self._thread.ident)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            ticket, kind, operation, args, on_done, on_error = job
+            with self._running_lock:
+                # Checked under the lock: a job superseded from now on is
+                # running, so submit() will cancel it
+                skip = self._closing or not self.is_current(ticket, kind)
+                if not skip:
+                    self._running = (ticket, kind)
+            if skip:
+                self._results.put((ticket, kind, None, ()))
+                continue
+            try:
+                result = operation(*args)
+            except Exception as e:
+                self._results.put((ticket, kind, on_error, (e,)))
+            else:
+                self._results.put((ticket, kind, on_done, (result,)))
+            finally:
+                with self._running_lock:
+                    self._running = None
+
+    def _start_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        delivered = False
+        while not self._results.empty():
+            ticket, kind, callback, args = self._results.get_nowait()
+            if ticket is not None:
+                self._pending -= 1
+                delivered = True
+                if not self.is_current(ticket, kind):
+                    continue  # superseded, drop the result
+            if callback is not None:
+                try:
+                    callback(*args)
+                except Exception:
+                    # Keep polling; report like any other Tk callback error
+                    self.root.report_callback_exception(*sys.exc_info())
+
+        if delivered:
+            self._busy_changed()
+        if self._pending:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def _busy_changed(self):
+        if self.on_busy is not None:
+            self.on_busy(self._pending)
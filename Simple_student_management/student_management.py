@@ -1,78 +1,325 @@
+import os
+import time
 from tkinter import *
-from tkinter import ttk, messagebox
-import psycopg2
+from tkinter import ttk, messagebox, filedialog
 
+from db_worker import DatabaseWorker
+from student_repository import StudentRepository
 
-def run_query(query, parameters=()):
-    conn = psycopg2.connect(dbname="studentdb", user="postgres",
-                            password="admin123", host="localhost", port="5432")
-    cur = conn.cursor()
-    query_result = None
+# Rows fetched per page, and the most rows ever kept in the Treeview
+PAGE_SIZE = 100
+WINDOW_ROWS = 300
 
-    try:
-        cur.execute(query, parameters)
-        if query.lower().startswith("select"):
-            query_result = cur.fetchall()
-        conn.commit()
-    except psycopg2.Error as e:
-        messagebox.showerror("Database Error", str(e))
-    finally:
-        cur.close()
-        conn.close()
-    return query_result
+# Wait this long after the last keystroke before searching (milliseconds)
+SEARCH_DEBOUNCE_MS = 250
+
+# On close, wait at most this long for cancelled work to wind down (milliseconds)
+CLOSE_TIMEOUT_MS = 5000
+
+# Keyset paging state for the rows currently in the Treeview; "term" is the
+# active search (empty for the full roster)
+page_state = {"more_before": False, "more_after": False, "loading": False,
+              "term": "", "search_job": None}
+
+
+def open_repository():
+    # Set STUDENTDB_SQLITE=<path> to use a local SQLite file instead of PostgreSQL
+    sqlite_path = os.environ.get("STUDENTDB_SQLITE")
+    if sqlite_path:
+        return StudentRepository.sqlite(sqlite_path)
+    return StudentRepository.postgres(dbname="studentdb", user="postgres",
+                                      password="admin123", host="localhost", port="5432")
+
+
+def show_db_error(error):
+    # Default error handler for background database calls
+    messagebox.showerror("Database Error", str(error))
+
+
+def show_busy(pending):
+    # In-flight indicator: spin the progress bar while queries are running
+    if pending:
+        busy_bar.start(15)
+    else:
+        busy_bar.stop()
+
+
+def fetch_after(term, student_id):
+    # Runs on the database worker thread
+    if term:
+        return repo.search_after(term, student_id, PAGE_SIZE)
+    return repo.students_after(student_id, PAGE_SIZE)
+
+
+def fetch_before(term, student_id):
+    # Runs on the database worker thread
+    if term:
+        return repo.search_before(term, student_id, PAGE_SIZE)
+    return repo.students_before(student_id, PAGE_SIZE)
+
+
+def submit_page(operation, *args, on_done):
+    # Page loads share one kind, so a newer load supersedes an older one
+    page_state["loading"] = True
+
+    def done(records):
+        page_state["loading"] = False
+        on_done(records)
+
+    def failed(error):
+        page_state["loading"] = False
+        show_db_error(error)
+
+    worker.submit(operation, *args, kind="page", on_done=done, on_error=failed)
 
 
 def refresh_treeview():
-    # Clear the current items in the treeview
-    for item in tree.get_children():
-        tree.delete(item)
-    # Re-fetch and display the updated data
-    records = run_query("SELECT * FROM students;")
+    # Full reload, only used on start-up and on demand (Reload button).
+    # Only the first page is fetched, later pages load while scrolling
+    submit_page(fetch_after, page_state["term"], 0, on_done=fill_treeview)
+
+
+def fill_treeview(records):
+    tree.delete(*tree.get_children())
     for record in records:
-        tree.insert('', END, values=record)
+        tree.insert('', END, iid=str(record[0]), values=record)
+    page_state["more_before"] = False
+    page_state["more_after"] = len(records) == PAGE_SIZE
 
 
-def create_table():
-    query = "CREATE TABLE IF NOT EXISTS students(student_id SERIAL PRIMARY KEY, name TEXT, address TEXT, age INT, number TEXT);"
-    run_query(query)
-    messagebox.showinfo("Information", "Table created successfully.")
+def load_next_page():
+    items = tree.get_children()
+    if not items:
+        return refresh_treeview()
+    anchor = items[-1]
+    submit_page(fetch_after, page_state["term"], int(anchor),
+                on_done=lambda records: append_page(anchor, records))
+
+
+def append_page(anchor, records):
+    for record in records:
+        if not tree.exists(str(record[0])):
+            tree.insert('', END, iid=str(record[0]), values=record)
+    page_state["more_after"] = len(records) == PAGE_SIZE
+
+    # Drop rows scrolled far off the top to keep the window bounded
+    items = tree.get_children()
+    if len(items) > WINDOW_ROWS:
+        tree.delete(*items[:len(items) - WINDOW_ROWS])
+        page_state["more_before"] = True
+    if tree.exists(anchor):
+        tree.see(anchor)
+
+
+def load_previous_page():
+    items = tree.get_children()
+    if not items:
+        return refresh_treeview()
+    anchor = items[0]
+    submit_page(fetch_before, page_state["term"], int(anchor),
+                on_done=lambda records: prepend_page(anchor, records))
+
+
+def prepend_page(anchor, records):
+    for index, record in enumerate(records):
+        if not tree.exists(str(record[0])):
+            tree.insert('', index, iid=str(record[0]), values=record)
+    page_state["more_before"] = len(records) == PAGE_SIZE
+
+    # Drop rows scrolled far off the bottom to keep the window bounded
+    items = tree.get_children()
+    if len(items) > WINDOW_ROWS:
+        tree.delete(*items[WINDOW_ROWS:])
+        page_state["more_after"] = True
+    if tree.exists(anchor):
+        tree.see(anchor)
+
+
+def on_tree_scroll(first, last):
+    # Fetch the neighbouring page when the view gets close to either end
+    tree_scroll.set(first, last)
+    if page_state["loading"]:
+        return
+    if float(last) >= 0.98 and page_state["more_after"]:
+        load_next_page()
+    elif float(first) <= 0.02 and page_state["more_before"]:
+        load_previous_page()
+
+
+def schedule_search(*_):
+    # Debounce: only the last keystroke in a burst runs a query
+    if page_state["search_job"] is not None:
+        root.after_cancel(page_state["search_job"])
+    page_state["search_job"] = root.after(SEARCH_DEBOUNCE_MS, run_search)
+
+
+def run_search():
+    page_state["search_job"] = None
+    term = search_var.get().strip()
+    if term == page_state["term"]:
+        return
+    page_state["term"] = term
     refresh_treeview()
 
 
+def show_record(record):
+    # Insert or update a single row; the Treeview item id is the student id,
+    # so finding the row for a student is a direct lookup
+    item = str(record[0])
+    if tree.exists(item):
+        tree.item(item, values=record)
+    elif not page_state["more_after"] and not page_state["term"]:
+        # New ids sort last, only show them if the window reaches the end
+        tree.insert('', END, iid=item, values=record)
+
+
+def remove_record(student_id):
+    item = str(student_id)
+    if tree.exists(item):
+        tree.delete(item)
+
+
+def create_table():
+    def done(_):
+        messagebox.showinfo("Information", "Table created successfully.")
+        refresh_treeview()
+
+    worker.submit(repo.create_table, on_done=done)
+
+
 def insert_data():
-    query = "INSERT INTO students(name, address, age, number) VALUES (%s, %s, %s, %s)"
     parameters = (name_entry.get(), address_entry.get(),
                   age_entry.get(), number_entry.get())
-    run_query(query, parameters)
-    messagebox.showinfo("Information", "Data inserted successfully.")
-    refresh_treeview()
+
+    def done(record):
+        show_record(record)
+        messagebox.showinfo("Information", "Data inserted successfully.")
+
+    worker.submit(repo.add_student, *parameters, on_done=done)
 
 
 def update_data():
     selected_item = tree.selection()[0]  # Get selected item
     student_id = tree.item(selected_item)['values'][0]
-    query = "UPDATE students SET name = %s, address = %s, age = %s, number = %s WHERE student_id = %s"
     parameters = (name_entry.get(), address_entry.get(),
-                  age_entry.get(), number_entry.get(), student_id)
-    run_query(query, parameters)
-    messagebox.showinfo("Information", "Data updated successfully.")
-    refresh_treeview()
+                  age_entry.get(), number_entry.get())
+
+    def done(record):
+        if record is None:
+            return
+        show_record(record)
+        messagebox.showinfo("Information", "Data updated successfully.")
+
+    worker.submit(repo.update_student, student_id, *parameters, on_done=done)
 
 
 def delete_data():
     selected_item = tree.selection()[0]  # Get selected item
     student_id = tree.item(selected_item)['values'][0]
-    query = "DELETE FROM students WHERE student_id = %s"
-    parameters = (student_id,)
-    run_query(query, parameters)
-    messagebox.showinfo("Information", "Data deleted successfully.")
-    refresh_treeview()
+
+    def done(_):
+        remove_record(student_id)
+        messagebox.showinfo("Information", "Data deleted successfully.")
+
+    worker.submit(repo.delete_student, student_id, on_done=done)
+
+
+def show_progress(rows):
+    status_var.set(f"Importing... {rows} rows")
+
+
+def import_file(path):
+    # Runs on the database worker thread; progress is posted back to Tk
+    with open(path, newline="", encoding="utf-8") as fp:
+        return repo.import_csv(
+            fp, progress=lambda rows: worker.call_soon(show_progress, rows))
+
+
+def import_data():
+    path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"),
+                                                 ("All files", "*.*")])
+    if not path:
+        return
+
+    def done(result):
+        rate = result.imported / result.seconds if result.seconds else 0
+        status_var.set(f"Imported {result.imported} rows ({rate:.0f} rows/sec)")
+        refresh_treeview()
+
+        message = f"Imported {result.imported} rows in {result.seconds:.2f}s ({rate:.0f} rows/sec)."
+        if result.rejected:
+            message += f"\n\n{result.rejected} rows rejected:\n" + "\n".join(result.errors)
+        messagebox.showinfo("Information", message)
+
+    def failed(error):
+        status_var.set("Import failed")
+        messagebox.showerror("Import Error", str(error))
+
+    # Rows are validated and streamed into the table (COPY FROM STDIN)
+    status_var.set("Importing...")
+    worker.submit(import_file, path, on_done=done, on_error=failed)
+
+
+def export_file(path):
+    # Runs on the database worker thread
+    start = time.perf_counter()
+    with open(path, "w", newline="", encoding="utf-8") as fp:
+        count = repo.export_csv(fp)
+    return count, time.perf_counter() - start
+
+
+def export_data():
+    path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                        filetypes=[("CSV files", "*.csv")])
+    if not path:
+        return
+
+    def done(result):
+        count, seconds = result
+        rate = count / seconds if seconds else 0
+        status_var.set(f"Exported {count} rows ({rate:.0f} rows/sec)")
+        messagebox.showinfo("Information", "Data exported successfully.")
+
+    def failed(error):
+        status_var.set("Export failed")
+        messagebox.showerror("Export Error", str(error))
+
+    # Rows stream straight into the file (COPY TO STDOUT)
+    status_var.set("Exporting...")
+    worker.submit(export_file, path, on_done=done, on_error=failed)
+
+
+def on_close():
+    # Cancel running work and drop queued jobs instead of waiting for them:
+    # the window goes away at once, cleanup finishes from the event loop
+    root.withdraw()
+    worker.close()
+    finish_close(time.monotonic() + CLOSE_TIMEOUT_MS / 1000)
+
+
+def finish_close(deadline):
+    if not worker.closed and time.monotonic() < deadline:
+        root.after(50, finish_close, deadline)
+        return
+    for name, (count, avg_ms, max_ms) in sorted(repo.latency_report().items()):
+        print(f"{name:<14} {count:>6} queries  avg {avg_ms:7.2f} ms  max {max_ms:7.2f} ms")
+    if worker.closed:
+        repo.close()  # otherwise the (daemon) worker still holds a connection
+    root.destroy()
+
+
+# Pooled database access shared by all operations
+repo = open_repository()
 
 
 # Setting up the main window
 root = Tk()
 root.title("Student Management System")
 
+# All database calls run on this worker, off the Tk main thread
+worker = DatabaseWorker(root, on_busy=show_busy, on_error=show_db_error,
+                        cancel=repo.cancel)
+
 # Input fields and labels
 frame = LabelFrame(root, text="Student Data")
 frame.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
@@ -105,16 +352,31 @@ Button(button_frame, text="Update Data",
        command=update_data).grid(row=0, column=2, padx=5)
 Button(button_frame, text="Delete Data",
        command=delete_data).grid(row=0, column=3, padx=5)
+Button(button_frame, text="Reload",
+       command=refresh_treeview).grid(row=0, column=4, padx=5)
+Button(button_frame, text="Import CSV",
+       command=import_data).grid(row=0, column=5, padx=5)
+Button(button_frame, text="Export CSV",
+       command=export_data).grid(row=0, column=6, padx=5)
+
+# Search box (name, address or phone number)
+search_frame = Frame(root)
+search_frame.grid(row=2, column=0, padx=10, pady=(5, 0), sticky="ew")
+
+Label(search_frame, text="Search:").pack(side=LEFT)
+search_var = StringVar()
+search_var.trace_add("write", schedule_search)
+Entry(search_frame, textvariable=search_var).pack(side=LEFT, fill=X, expand=True)
 
 # Treeview for displaying the student records
 tree_frame = Frame(root)
-tree_frame.grid(row=2, column=0, pady=10, sticky="nsew")
+tree_frame.grid(row=3, column=0, pady=10, sticky="nsew")
 
 tree_scroll = Scrollbar(tree_frame)
 tree_scroll.pack(side=RIGHT, fill=Y)
 
 tree = ttk.Treeview(
-    tree_frame, yscrollcommand=tree_scroll.set, selectmode="browse")
+    tree_frame, yscrollcommand=on_tree_scroll, selectmode="browse")
 tree.pack()
 
 tree_scroll.config(command=tree.yview)
@@ -133,7 +395,19 @@ tree.heading("address", text="Address", anchor=CENTER)
 tree.heading("age", text="Age", anchor=CENTER)
 tree.heading("number", text="Phone Number", anchor=CENTER)
 
+# Status line and in-flight indicator for long-running operations
+status_frame = Frame(root)
+status_frame.grid(row=4, column=0, padx=10, pady=(0, 5), sticky="ew")
+
+status_var = StringVar(value="Ready")
+Label(status_frame, textvariable=status_var, anchor="w").pack(
+    side=LEFT, fill=X, expand=True)
+busy_bar = ttk.Progressbar(status_frame, mode="indeterminate", length=80)
+busy_bar.pack(side=RIGHT)
+
 # Initial refresh to display any existing records
 refresh_treeview()
 
+root.protocol("WM_DELETE_WINDOW", on_close)
+
 root.mainloop()
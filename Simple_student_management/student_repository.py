@@ -0,0 +1,500 @@
+"""
+Data-access layer for the student management app.
+
+StudentRepository keeps a pool of open connections, runs each statement as
+a (server-side) prepared statement and wraps writes in explicit
+transactions. It talks to PostgreSQL through psycopg2, or to SQLite as a
+local stand-in when no PostgreSQL server is around:
+
+    repo = StudentRepository.postgres(dbname="studentdb", user="postgres",
+                                      password="admin123", host="localhost")
+    repo = StudentRepository.sqlite("students.db")
+
+Every statement is timed; latency_report() summarizes count / average /
+max latency per statement.
+
+Bulk import/export stream CSV through COPY FROM STDIN / COPY TO STDOUT on
+PostgreSQL (batched executemany on SQLite), so neither direction holds the
+whole file in memory.
+
+cancel(thread_id) interrupts whatever another thread is running, from any
+thread: connection.cancel() on PostgreSQL, interrupt() on SQLite. The
+interrupted call raises and its transaction is rolled back.
+"""
+import csv
+import io
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import chain, islice
+
+try:
+    import psycopg2
+    import psycopg2.pool
+except ImportError:  # only needed for PostgreSQL
+    psycopg2 = None
+
+COLUMNS = ("student_id", "name", "address", "age", "number")
+_SELECT_COLUMNS = ", ".join(COLUMNS)
+
+# Statements are written with %s placeholders (psycopg2 style) and
+# translated for SQLite
+STATEMENTS = {
+    "select_all": f"SELECT {_SELECT_COLUMNS} FROM students ORDER BY student_id",
+    # Keyset pagination: seek on the primary key instead of OFFSET
+    "page_after": f"SELECT {_SELECT_COLUMNS} FROM students WHERE student_id > %s "
+                  "ORDER BY student_id LIMIT %s",
+    "page_before": f"SELECT {_SELECT_COLUMNS} FROM students WHERE student_id < %s "
+                   "ORDER BY student_id DESC LIMIT %s",
+    "insert": "INSERT INTO students(name, address, age, number) "
+              f"VALUES (%s, %s, %s, %s) RETURNING {_SELECT_COLUMNS}",
+    "update": "UPDATE students SET name = %s, address = %s, age = %s, number = %s "
+              f"WHERE student_id = %s RETURNING {_SELECT_COLUMNS}",
+    "delete": "DELETE FROM students WHERE student_id = %s",
+    # Substring search on name / address / phone, served by trigram indexes
+    "search_after": f"SELECT {_SELECT_COLUMNS} FROM students "
+                    "WHERE (name ILIKE %s OR address ILIKE %s OR number ILIKE %s) "
+                    "AND student_id > %s ORDER BY student_id LIMIT %s",
+    "search_before": f"SELECT {_SELECT_COLUMNS} FROM students "
+                     "WHERE (name ILIKE %s OR address ILIKE %s OR number ILIKE %s) "
+                     "AND student_id < %s ORDER BY student_id DESC LIMIT %s",
+}
+
+# SQLite has no trigram indexes: search is a case-insensitive prefix match,
+# written as ranges so the NOCASE indexes are always used
+_PREFIX_MATCH = ("((name COLLATE NOCASE >= ? AND name COLLATE NOCASE < ?) "
+                 "OR (address COLLATE NOCASE >= ? AND address COLLATE NOCASE < ?) "
+                 "OR (number COLLATE NOCASE >= ? AND number COLLATE NOCASE < ?))")
+SQLITE_STATEMENTS = {
+    # Common terms: walk the primary key and stop after one page
+    "search_after": f"SELECT {_SELECT_COLUMNS} FROM students WHERE {_PREFIX_MATCH} "
+                    "AND student_id > ? ORDER BY student_id LIMIT ?",
+    "search_before": f"SELECT {_SELECT_COLUMNS} FROM students WHERE {_PREFIX_MATCH} "
+                     "AND student_id < ? ORDER BY student_id DESC LIMIT ?",
+    # Selective terms: look the matches up in the NOCASE indexes and sort
+    # them (the unary + keeps SQLite off the primary key)
+    "search_after_selective": f"SELECT {_SELECT_COLUMNS} FROM students WHERE {_PREFIX_MATCH} "
+                              "AND +student_id > ? ORDER BY +student_id LIMIT ?",
+    "search_before_selective": f"SELECT {_SELECT_COLUMNS} FROM students WHERE {_PREFIX_MATCH} "
+                               "AND +student_id < ? ORDER BY +student_id DESC LIMIT ?",
+    "search_count": f"SELECT count(*) FROM (SELECT 1 FROM students WHERE {_PREFIX_MATCH} LIMIT ?)",
+}
+
+# SQLite picks the index plan when a term matches fewer rows than this
+SELECTIVE_MATCHES = 20000
+
+IMPORT_COLUMNS = ("name", "address", "age", "number")
+
+
+class Cancelled(Exception):
+    """The call was stopped by StudentRepository.cancel()"""
+
+
+# imported / rejected row counts, the first few rejection messages, runtime
+ImportResult = namedtuple("ImportResult", "imported rejected errors seconds")
+
+CREATE_TABLE = {
+    "postgres": "CREATE TABLE IF NOT EXISTS students(student_id SERIAL PRIMARY KEY, "
+                "name TEXT, address TEXT, age INT, number TEXT)",
+    "sqlite": "CREATE TABLE IF NOT EXISTS students(student_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+              "name TEXT, address TEXT, age INT, number TEXT)",
+}
+
+SEARCH_INDEXES = {
+    "postgres": ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + [
+        f"CREATE INDEX IF NOT EXISTS students_{column}_trgm "
+        f"ON students USING gin ({column} gin_trgm_ops)"
+        for column in ("name", "address", "number")
+    ],
+    "sqlite": [
+        f"CREATE INDEX IF NOT EXISTS students_{column}_nocase "
+        f"ON students({column} COLLATE NOCASE)"
+        for column in ("name", "address", "number")
+    ],
+}
+
+
+def _validated_rows(reader, errors, max_errors=20):
+    """Yield clean (name, address, age, number) tuples from a CSV reader
+
+    A header row is optional; with one, columns are matched by name (so a
+    file written by export_csv() can be imported again). Invalid rows are
+    skipped and counted in errors["rejected"].
+    """
+    first = next(reader, None)
+    if first is None:
+        return
+    header = [column.strip().lower() for column in first]
+    if "name" in header:
+        positions = [header.index(column) if column in header else None
+                     for column in IMPORT_COLUMNS]
+        line_no = 1
+    else:
+        positions = [0, 1, 2, 3]
+        reader = chain([first], reader)
+        line_no = 0
+
+    for line_no, row in enumerate(reader, start=line_no + 1):
+        values = [row[pos].strip() if pos is not None and pos < len(row) else ""
+                  for pos in positions]
+        name, address, age, number = values
+        problem = None
+        if not name:
+            problem = "missing name"
+        elif age:
+            try:
+                age = int(age)
+            except ValueError:
+                problem = f"invalid age {age!r}"
+            else:
+                if not 0 <= age <= 150:
+                    problem = f"age out of range ({age})"
+        else:
+            age = None
+
+        if problem:
+            errors["rejected"] += 1
+            if len(errors["messages"]) < max_errors:
+                errors["messages"].append(f"line {line_no}: {problem}")
+            continue
+        yield name, address, age, number
+
+
+class _CopyStream:
+    """Read-only file object that feeds validated rows to COPY FROM STDIN"""
+
+    def __init__(self, rows, progress=None, progress_every=5000):
+        self._rows = rows
+        self._progress = progress
+        self._progress_every = progress_every
+        self._buf = io.StringIO()
+        self._writer = csv.writer(self._buf, lineterminator="\n")
+        self.count = 0
+
+    def read(self, size=8192):
+        buf = self._buf
+        while buf.tell() < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self.count += 1
+            if self._progress and self.count % self._progress_every == 0:
+                self._progress(self.count)
+        data = buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        return data
+
+
+class _SQLitePool:
+    """Minimal pool for SQLite: one shared connection, one user at a time"""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def getconn(self):
+        self._lock.acquire()
+        return self._conn
+
+    def putconn(self, conn, close=False):
+        self._lock.release()
+
+    def closeall(self):
+        self._conn.close()
+
+
+class StudentRepository:
+    """Pooled, prepared and timed access to the students table"""
+
+    def __init__(self, pool, dialect):
+        self.pool = pool
+        self.dialect = dialect
+        if dialect == "postgres":
+            self.Error = psycopg2.Error
+        else:
+            self.Error = sqlite3.Error
+
+        # Names of statements already prepared, per pooled connection
+        self._prepared = {}
+        # statement name -> [count, total seconds, max seconds]
+        self._latency = {}
+        self._latency_lock = threading.Lock()
+        # thread id -> connection it has checked out, for cancel()
+        self._active = {}
+        self._cancelled = set()
+        self._active_lock = threading.Lock()
+
+    @classmethod
+    def postgres(cls, minconn=1, maxconn=5, **dsn):
+        """Repository backed by a thread-safe psycopg2 connection pool"""
+        if psycopg2 is None:
+            raise ImportError("psycopg2 is required for PostgreSQL")
+        pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, **dsn)
+        return cls(pool, "postgres")
+
+    @classmethod
+    def sqlite(cls, path=":memory:"):
+        """Repository backed by a local SQLite database"""
+        return cls(_SQLitePool(path), "sqlite")
+
+    def close(self):
+        self.pool.closeall()
+
+    # -- cancellation --------------------------------------------------
+
+    def cancel(self, thread_id):
+        """Interrupt the call running on thread thread_id, if any
+
+        Safe from any thread. A running statement is cancelled on the
+        server; a bulk import also stops between rows.
+        """
+        with self._active_lock:
+            conn = self._active.get(thread_id)
+            if conn is None:
+                return
+            self._cancelled.add(thread_id)
+            if self.dialect == "postgres":
+                conn.cancel()
+            else:
+                conn.interrupt()
+
+    def _check_out(self):
+        conn = self.pool.getconn()
+        with self._active_lock:
+            self._active[threading.get_ident()] = conn
+        return conn
+
+    def _check_in(self, conn, close=False):
+        # Under the lock, so cancel() never reaches a connection after it
+        # went back to the pool
+        thread_id = threading.get_ident()
+        with self._active_lock:
+            self._active.pop(thread_id, None)
+            self._cancelled.discard(thread_id)
+        self.pool.putconn(conn, close=close)
+
+    def _until_cancelled(self, rows):
+        thread_id = threading.get_ident()
+        for row in rows:
+            if thread_id in self._cancelled:
+                raise Cancelled("import cancelled")
+            yield row
+
+    # -- transactions and statement execution --------------------------
+
+    @contextmanager
+    def transaction(self):
+        """Yield a cursor; commit on success, roll back on error"""
+        conn = self._check_out()
+        broken = False
+        cur = conn.cursor()
+        try:
+            yield cur
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except self.Error:
+                broken = True
+            raise
+        finally:
+            cur.close()
+            if broken:
+                self._prepared.pop(id(conn), None)
+            self._check_in(conn, close=broken)
+
+    def execute(self, cur, name, parameters=()):
+        """Run a named statement on a cursor from transaction()"""
+        start = time.perf_counter()
+        if self.dialect == "postgres":
+            self._execute_prepared(cur, name, parameters)
+        else:
+            sql = SQLITE_STATEMENTS.get(name) or STATEMENTS[name].replace("%s", "?")
+            cur.execute(sql, parameters)
+        self._record(name, time.perf_counter() - start)
+
+    def _execute_prepared(self, cur, name, parameters):
+        prepared = self._prepared.setdefault(id(cur.connection), set())
+        if name not in prepared:
+            sql = STATEMENTS[name]
+            for number in range(1, sql.count("%s") + 1):
+                sql = sql.replace("%s", f"${number}", 1)
+            cur.execute(f"PREPARE {name} AS {sql}")
+            prepared.add(name)
+        if parameters:
+            placeholders = ", ".join(["%s"] * len(parameters))
+            cur.execute(f"EXECUTE {name} ({placeholders})", parameters)
+        else:
+            cur.execute(f"EXECUTE {name}")
+
+    def _record(self, name, seconds):
+        with self._latency_lock:
+            stats = self._latency.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def latency_report(self):
+        """Per-statement latency as {name: (count, avg_ms, max_ms)}"""
+        with self._latency_lock:
+            return {
+                name: (count, total / count * 1000, worst * 1000)
+                for name, (count, total, worst) in self._latency.items()
+            }
+
+    # -- students ------------------------------------------------------
+
+    def create_table(self):
+        """Create the students table and the indexes used by search"""
+        start = time.perf_counter()
+        with self.transaction() as cur:
+            cur.execute(CREATE_TABLE[self.dialect])
+        # Separate transaction: the table stays even if pg_trgm is unavailable
+        with self.transaction() as cur:
+            for sql in SEARCH_INDEXES[self.dialect]:
+                cur.execute(sql)
+        self._record("create_table", time.perf_counter() - start)
+
+    def all_students(self):
+        with self.transaction() as cur:
+            self.execute(cur, "select_all")
+            return cur.fetchall()
+
+    def students_after(self, student_id=0, limit=100):
+        """Next page of students with an id greater than student_id"""
+        with self.transaction() as cur:
+            self.execute(cur, "page_after", (student_id, limit))
+            return cur.fetchall()
+
+    def students_before(self, student_id, limit=100):
+        """Previous page of students with an id less than student_id"""
+        with self.transaction() as cur:
+            self.execute(cur, "page_before", (student_id, limit))
+            return cur.fetchall()[::-1]
+
+    def _search_parameters(self, term):
+        if self.dialect == "postgres":
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            return (f"%{escaped}%",) * 3
+        return (term, term + "\U0010ffff") * 3
+
+    def _search(self, direction, term, student_id, limit):
+        name = f"search_{direction}"
+        parameters = self._search_parameters(term)
+        with self.transaction() as cur:
+            if self.dialect == "sqlite":
+                # PostgreSQL's planner makes this choice from its statistics;
+                # SQLite needs a cheap bounded probe to tell rare from common
+                self.execute(cur, "search_count", parameters + (SELECTIVE_MATCHES,))
+                if cur.fetchone()[0] < SELECTIVE_MATCHES:
+                    name += "_selective"
+            self.execute(cur, name, parameters + (student_id, limit))
+            return cur.fetchall()
+
+    def search_after(self, term, student_id=0, limit=100):
+        """Next page of students matching term on name, address or phone"""
+        return self._search("after", term, student_id, limit)
+
+    def search_before(self, term, student_id, limit=100):
+        """Previous page of students matching term"""
+        return self._search("before", term, student_id, limit)[::-1]
+
+    def iter_students(self, batch_size=1000):
+        """Yield every student in id order without loading them all at once
+
+        PostgreSQL uses a named (server-side) cursor, so only batch_size
+        rows are held on the client at any time.
+        """
+        conn = self._check_out()
+        if self.dialect == "postgres":
+            cur = conn.cursor(name="students_export")
+            cur.itersize = batch_size
+        else:
+            cur = conn.cursor()
+        start = time.perf_counter()
+        try:
+            cur.execute(STATEMENTS["select_all"])
+            rows = cur.fetchmany(batch_size)
+            while rows:
+                yield from rows
+                rows = cur.fetchmany(batch_size)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            self._check_in(conn)
+            self._record("iter_students", time.perf_counter() - start)
+
+    def import_csv(self, fp, progress=None, batch_size=5000):
+        """Bulk-load students from an open CSV file in one transaction
+
+        progress, if given, is called with the running row count every
+        batch_size rows. Returns an ImportResult.
+        """
+        errors = {"rejected": 0, "messages": []}
+        rows = self._until_cancelled(_validated_rows(csv.reader(fp), errors))
+        start = time.perf_counter()
+
+        with self.transaction() as cur:
+            if self.dialect == "postgres":
+                stream = _CopyStream(rows, progress, batch_size)
+                cur.copy_expert(
+                    "COPY students(name, address, age, number) "
+                    "FROM STDIN WITH (FORMAT csv)", stream)
+                imported = stream.count
+            else:
+                sql = STATEMENTS["insert"].split(" RETURNING")[0].replace("%s", "?")
+                imported = 0
+                batch = list(islice(rows, batch_size))
+                while batch:
+                    cur.executemany(sql, batch)
+                    imported += len(batch)
+                    if progress:
+                        progress(imported)
+                    batch = list(islice(rows, batch_size))
+
+        seconds = time.perf_counter() - start
+        self._record("import", seconds)
+        return ImportResult(imported, errors["rejected"], errors["messages"], seconds)
+
+    def export_csv(self, fp):
+        """Stream every student to an open CSV file; return the row count"""
+        start = time.perf_counter()
+        if self.dialect == "postgres":
+            with self.transaction() as cur:
+                cur.copy_expert(
+                    f"COPY ({STATEMENTS['select_all']}) TO STDOUT WITH (FORMAT csv, HEADER)", fp)
+                count = cur.rowcount
+        else:
+            writer = csv.writer(fp)
+            writer.writerow(COLUMNS)
+            count = 0
+            for row in self.iter_students():
+                writer.writerow(row)
+                count += 1
+        self._record("export", time.perf_counter() - start)
+        return count
+
+    def add_student(self, name, address, age, number):
+        """Insert a student and return the stored row"""
+        with self.transaction() as cur:
+            self.execute(cur, "insert", (name, address, age, number))
+            return cur.fetchone()
+
+    def update_student(self, student_id, name, address, age, number):
+        """Update a student and return the stored row (None if missing)"""
+        with self.transaction() as cur:
+            self.execute(cur, "update", (name, address, age, number, student_id))
+            return cur.fetchone()
+
+    def delete_student(self, student_id):
+        """Delete a student; return True if a row was removed"""
+        with self.transaction() as cur:
+            self.execute(cur, "delete", (student_id,))
+            return cur.rowcount > 0
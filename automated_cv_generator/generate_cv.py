@@ -1,3 +1,5 @@
+import io
+from functools import lru_cache
 from tkinter import messagebox
  
 from tkinter import *
@@ -5,11 +7,25 @@ from fpdf import FPDF
 import pyqrcode
  
  
+@lru_cache(maxsize=128)
+def qr_png_bytes(website, scale=6):
+    # Render the QR code to PNG bytes in memory, cached per website URL
+    buf = io.BytesIO()
+    pyqrcode.create(website).png(buf, scale=scale)
+    return buf.getvalue()
+ 
+ 
 class PDFCV(FPDF):
+    def __init__(self, qr_png=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.qr_png = qr_png
+ 
     def header(self):
         # Add a logo or header information if desired
-        self.image("mywebsite.png", 10, 8, 33, title="Portfolio Site")
-        pass
+        # fpdf keys in-memory images by content hash, so the QR is embedded
+        # once per document and every later page reuses the same object
+        if self.qr_png:
+            self.image(io.BytesIO(self.qr_png), 10, 8, 33, title="Portfolio Site")
  
     def footer(self):
         # Add footer information if desired
@@ -105,16 +121,16 @@ def generate_cv_pdf():
  
     about_me = entry_about_me.get("1.0", END)
  
-    # Create QR code
-    qrcode = pyqrcode.create(website)
-    qrcode.png('mywebsite.png', scale=6)
     # Validate input
     if not name or not email or not phone_number or not address or not skills or not work_experience or not education or not about_me:
         messagebox.showerror("Error", "Please fill in all the fields.")
         return
  
+    # Create QR code in memory (no shared file on disk)
+    qr_png = qr_png_bytes(website) if website else None
+ 
     # Create PDF CV
-    cv = PDFCV()
+    cv = PDFCV(qr_png)
     cv.generate_cv(name, email, phone_number, address, skills,
                    work_experience, education, about_me)
  
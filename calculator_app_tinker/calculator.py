@@ -1,7 +1,6 @@
 from tkinter import *
 
-from sqlalchemy import column
-import ast
+from expression import evaluate
 
 root = Tk()
 
@@ -24,9 +23,8 @@ def clear_all():
 def calculate():
     entire_string = display.get()
     try:
-
-        node = ast.parse(entire_string,mode="eval")
-        result = eval(compile(node,'<string>','eval'))
+        # whitelisted, compiled once per expression (see expression.py)
+        result = evaluate(entire_string)
         clear_all()
         display.insert(0, result)
     except Exception:
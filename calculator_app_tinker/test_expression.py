@@ -0,0 +1,49 @@
+"""
+Checks for the expression engine.
+
+    python -m unittest test_expression
+"""
+import time
+import unittest
+from fractions import Fraction
+
+from expression import ExpressionError, MAX_POWER_BITS, evaluate, evaluate_many
+
+
+class PowerLimitTest(unittest.TestCase):
+
+    def assertRefusedQuickly(self, text, variables=None):
+        start = time.perf_counter()
+        with self.assertRaises(ExpressionError):
+            evaluate(text, variables)
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_small_powers(self):
+        self.assertEqual(evaluate("2**10"), 1024)
+        self.assertEqual(evaluate("(10**100)**10"), 10**1000)
+        self.assertEqual(evaluate("1**1000000"), 1)
+        self.assertEqual(evaluate("(-1)**1000001"), -1)
+        self.assertEqual(evaluate("2**-2"), 0.25)
+
+    def test_huge_power(self):
+        self.assertRefusedQuickly("2**99999")
+        self.assertRefusedQuickly(f"2**{MAX_POWER_BITS}")
+
+    def test_nested_powers(self):
+        self.assertRefusedQuickly("(10**1000)**1000")
+        self.assertRefusedQuickly("((10**1000)**1000)**10")
+        self.assertRefusedQuickly("(((10**1000)**1000)**1000)**1000")
+        self.assertRefusedQuickly("9**9**9")
+
+    def test_power_of_variable(self):
+        self.assertRefusedQuickly("x**1000", {"x": 10**1000})
+        self.assertRefusedQuickly("x**100000", {"x": Fraction(1, 3)})
+
+    def test_evaluate_many_returns_the_error(self):
+        results = evaluate_many(["2+2", "(10**1000)**1000"], errors="return")
+        self.assertEqual(results[0], 4)
+        self.assertIsInstance(results[1], ExpressionError)
+
+
+if __name__ == "__main__":
+    unittest.main()
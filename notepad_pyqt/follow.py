@@ -0,0 +1,168 @@
+"""
+Follow mode (like tail -f) for the notepad.
+
+FileFollower watches a file with QFileSystemWatcher (inotify on Linux)
+and also polls it every second, because watchers miss changes on some
+file systems and stop watching a file that was rotated away. Only the
+bytes after the last read position are read and decoded. Complete lines
+are emitted; a partial last line is held until its newline arrives. A
+truncated file is read again from the start, a rotated one (a new file
+under the same name) is followed after the rest of the old one is read.
+
+FollowView shows the lines in a read-only QPlainTextEdit whose
+maximumBlockCount drops the oldest lines, so memory stays flat however
+long a file is followed.
+"""
+import codecs
+import os
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextOption
+from PyQt6.QtWidgets import QPlainTextEdit
+
+from large_file import MAX_LINE_CHARS
+
+POLL_MS = 1000
+# Lines kept in the view, older ones are dropped
+SCROLLBACK_LINES = 100000
+# Following starts this far from the end of the file
+TAIL_BYTES = 1 << 20
+# At most this much is read per event, the rest after the GUI had a turn
+READ_CHUNK = 1 << 20
+
+
+class FileFollower(QObject):
+    """Emits the lines appended to a file"""
+
+    # One or more complete lines, without the last newline
+    lines = pyqtSignal(str)
+
+    def __init__(self, path, encoding="utf-8", parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.encoding = encoding
+        self._file = None
+        self._decoder = None
+        self._partial = ""
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.poll)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+
+    def start(self):
+        self._open(tail=True)
+        self.timer.start(POLL_MS)
+        self.poll()
+
+    def stop(self):
+        self.timer.stop()
+        if self.watcher.files():
+            self.watcher.removePaths(self.watcher.files())
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self, tail=False):
+        try:
+            self._file = open(self.path, "rb")
+        except FileNotFoundError:
+            self._file = None  # rotated away, poll() retries
+            return
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        self._partial = ""
+        if tail:
+            size = os.fstat(self._file.fileno()).st_size
+            if size > TAIL_BYTES:
+                self._file.seek(size - TAIL_BYTES)
+                self._file.readline()  # skip the cut-off first line
+        # The watcher forgets a path once the file is removed or renamed
+        if self.path not in self.watcher.files():
+            self.watcher.addPath(self.path)
+
+    def poll(self):
+        if not self.timer.isActive():
+            return  # stopped
+        if self._file is None:
+            self._open()
+            if self._file is None:
+                return
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None
+        current = os.fstat(self._file.fileno())
+
+        if stat is not None and (stat.st_ino, stat.st_dev) != (current.st_ino, current.st_dev):
+            # Log rotation: read what is left of the old file, then switch
+            while self._read_chunk():
+                pass
+            self._flush_partial()
+            self._file.close()
+            self._open()
+        elif current.st_size < self._file.tell():
+            # Truncated in place: start over from the beginning
+            self._flush_partial()
+            self._file.seek(0)
+            self._decoder.reset()
+
+        if self._file is not None and self._read_chunk():
+            QTimer.singleShot(0, self.poll)  # more to read, let the GUI run first
+
+    def _read_chunk(self):
+        """Read and emit up to READ_CHUNK bytes, return True if it was a full chunk"""
+        data = self._file.read(READ_CHUNK)
+        if not data:
+            return False
+        text = self._partial + self._decoder.decode(data)
+        head, newline, self._partial = text.rpartition("\n")
+        if newline:
+            self.lines.emit(head.replace("\r\n", "\n").removesuffix("\r"))
+        if len(self._partial) > MAX_LINE_CHARS:
+            self._flush_partial()  # a runaway line is cut into pieces
+        return len(data) == READ_CHUNK
+
+    def _flush_partial(self):
+        if self._partial:
+            self.lines.emit(self._partial.removesuffix("\r"))
+            self._partial = ""
+
+
+class FollowView(QPlainTextEdit):
+    """Read-only view of the end of a growing file"""
+
+    # Emitted when old lines were dropped, positions in the view shift
+    trimmed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.follower = None
+        self.setReadOnly(True)
+        self.setWordWrapMode(QTextOption.WrapMode.NoWrap)
+        self.setMaximumBlockCount(SCROLLBACK_LINES)
+
+    def follow(self, path):
+        self.stop()
+        self.clear()
+        self.follower = FileFollower(path, parent=self)
+        self.follower.lines.connect(self.append_lines)
+        self.follower.start()
+
+    def stop(self):
+        if self.follower is not None:
+            self.follower.stop()
+            self.follower.deleteLater()
+            self.follower = None
+
+    def append_lines(self, text):
+        # appendPlainText keeps the view at the bottom if it already was,
+        # so scrolling up to read stops the auto-scroll
+        limit = self.maximumBlockCount()
+        new_lines = text.count("\n") + 1
+        if new_lines > limit:
+            # Lines that would be dropped right away are never laid out
+            text = "\n".join(text.split("\n")[-limit:])
+        trimmed = self.blockCount() + new_lines > limit
+        self.appendPlainText(text)
+        if trimmed:
+            self.trimmed.emit()
@@ -0,0 +1,246 @@
+"""
+Large-file mode for the notepad.
+
+Huge files are memory-mapped instead of read into a QTextEdit. A line
+index is built in the background: for every 64 KB block of the file it
+stores how many lines start before that block, which is cheap to build
+(a C-level count per block) and small (about 8,000 entries for 500 MB).
+Finding line N is a binary search over the blocks plus a short scan
+inside one block.
+
+LargeFileView only ever holds the lines that fit on screen, in a
+read-only QPlainTextEdit driven by its own scrollbar.
+"""
+import mmap
+from array import array
+from bisect import bisect_right
+
+from PyQt6.QtCore import QEvent, Qt, QThread, pyqtSignal
+from PyQt6.QtGui import QTextOption
+from PyQt6.QtWidgets import QHBoxLayout, QPlainTextEdit, QScrollBar, QWidget
+
+BLOCK_SIZE = 1 << 16
+# Very long lines are cut off for display
+MAX_LINE_CHARS = 10000
+
+
+class LineIndex:
+    """Memory-mapped file with a block-level line index"""
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self._file = open(path, "rb")
+        self.size = self._file.seek(0, 2)
+        if self.size:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b""  # empty files cannot be mapped
+        # block_lines[b] = number of line starts before block b
+        self.block_lines = array("q", [0])
+        self.complete = self.size == 0
+
+    @property
+    def indexed_bytes(self):
+        return min(self.size, (len(self.block_lines) - 1) * BLOCK_SIZE)
+
+    @property
+    def line_count(self):
+        """Lines known so far (the full count once complete)"""
+        lines = self.block_lines[-1]
+        if self.complete and self.size and self.data[self.size - 1:self.size] != b"\n":
+            lines += 1  # last line without a trailing newline
+        elif not self.complete:
+            lines += 1
+        return max(lines, 1)
+
+    def build(self, progress=None, should_stop=lambda: False, report_every=256):
+        """Index the rest of the file; progress(line_count) is called now and then"""
+        data = self.data
+        blocks = self.block_lines
+        offset = self.indexed_bytes
+        while offset < self.size:
+            if should_stop():
+                return
+            end = min(offset + BLOCK_SIZE, self.size)
+            blocks.append(blocks[-1] + data[offset:end].count(b"\n"))
+            offset = end
+            if progress and len(blocks) % report_every == 0:
+                progress(self.line_count)
+        self.complete = True
+        if progress:
+            progress(self.line_count)
+
+    def line_offset(self, line):
+        """Byte offset where a line starts (None if not indexed yet)"""
+        if line == 0:
+            return 0
+        block = bisect_right(self.block_lines, line - 1) - 1
+        if block >= len(self.block_lines) - 1:
+            return None
+        # Skip to the (line - counted)th newline inside the block
+        pos = block * BLOCK_SIZE
+        for _ in range(line - self.block_lines[block]):
+            pos = self.data.find(b"\n", pos) + 1
+        return pos
+
+    def line_of_offset(self, offset):
+        """Line number containing a byte offset (None if not indexed yet)"""
+        block = offset // BLOCK_SIZE
+        if block >= len(self.block_lines) - 1 and not self.complete:
+            return None
+        block = min(block, len(self.block_lines) - 1)
+        start = block * BLOCK_SIZE
+        return self.block_lines[block] + self.data[start:offset].count(b"\n")
+
+    def lines(self, start, count):
+        """Decode up to count lines starting at line number start"""
+        pos = self.line_offset(start)
+        if pos is None:
+            return []
+        result = []
+        data = self.data
+        while len(result) < count and pos < self.size:
+            end = data.find(b"\n", pos)
+            if end == -1:
+                end = self.size
+            raw = data[pos:min(end, pos + MAX_LINE_CHARS * 4)]
+            text = raw.decode(self.encoding, errors="replace").rstrip("\r")
+            result.append(text[:MAX_LINE_CHARS])
+            pos = end + 1
+        return result
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+
+class IndexBuilder(QThread):
+    """Builds a LineIndex off the GUI thread"""
+
+    progress = pyqtSignal(int)
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+
+    def run(self):
+        self.index.build(progress=self.progress.emit,
+                         should_stop=self.isInterruptionRequested)
+
+
+class LargeFileView(QWidget):
+    """Read-only view that materializes only the visible lines"""
+
+    # Emitted after the visible window of lines has been replaced
+    refreshed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.index = None
+        self.builder = None
+
+        self.text_view = QPlainTextEdit(self)
+        self.text_view.setReadOnly(True)
+        self.text_view.setWordWrapMode(QTextOption.WrapMode.NoWrap)
+        self.text_view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.text_view.viewport().installEventFilter(self)
+        self.text_view.installEventFilter(self)
+
+        self.scrollbar = QScrollBar(Qt.Orientation.Vertical, self)
+        self.scrollbar.valueChanged.connect(self.refresh)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        layout.addWidget(self.text_view)
+        layout.addWidget(self.scrollbar)
+
+    def open(self, path):
+        """Map a file, show its first page and index the rest in the background"""
+        self.close_file()
+        self.index = LineIndex(path)
+        self.scrollbar.setValue(0)
+        self._update_range(self.index.line_count)
+        self.refresh()
+
+        self.builder = IndexBuilder(self.index, self)
+        self.builder.progress.connect(self._update_range)
+        self.builder.start()
+
+    def close_file(self):
+        if self.builder is not None:
+            self.builder.requestInterruption()
+            self.builder.wait()
+            self.builder = None
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+        self.text_view.clear()
+
+    @property
+    def top_line(self):
+        return self.scrollbar.value()
+
+    def visible_lines(self):
+        height = self.text_view.viewport().height()
+        return max(1, height // max(1, self.text_view.fontMetrics().lineSpacing()))
+
+    def scroll_to_line(self, line):
+        """Scroll so that line is the first visible line"""
+        self.scrollbar.setValue(line)
+
+    def _update_range(self, line_count):
+        self.scrollbar.setRange(0, max(0, line_count - self.visible_lines()))
+        self.scrollbar.setPageStep(self.visible_lines())
+        if self.top_line + self.visible_lines() >= line_count - 1:
+            self.refresh()  # newly indexed lines may now be on screen
+
+    def refresh(self):
+        if self.index is None:
+            return
+        lines = self.index.lines(self.top_line, self.visible_lines())
+        self.text_view.setPlainText("\n".join(lines))
+        self.refreshed.emit()
+
+    def visible_byte_range(self):
+        """(start, end) byte offsets of the lines currently on screen"""
+        start = self.index.line_offset(self.top_line)
+        end = self.index.line_offset(self.top_line + self.visible_lines())
+        if start is None:
+            return 0, 0
+        return start, self.index.size if end is None else end
+
+    def document_position(self, offset):
+        """Position in text_view of a byte offset inside the visible lines"""
+        line = self.index.line_of_offset(offset)
+        line_start = self.index.line_offset(line)
+        column = len(self.index.data[line_start:offset].decode(
+            self.index.encoding, errors="replace"))
+        block = self.text_view.document().findBlockByNumber(line - self.top_line)
+        if not block.isValid():  # below the last visible line
+            return self.text_view.document().characterCount() - 1
+        return block.position() + min(column, block.length() - 1)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.index is not None:
+            self._update_range(self.index.line_count)
+            self.refresh()
+
+    def eventFilter(self, obj, event):
+        # Scrolling is done by moving the window of lines, not the widget
+        if event.type() == QEvent.Type.Wheel:
+            steps = event.angleDelta().y() // 40
+            self.scrollbar.setValue(self.scrollbar.value() - steps)
+            return True
+        if event.type() == QEvent.Type.KeyPress:
+            key = event.key()
+            if key == Qt.Key.Key_PageDown:
+                self.scrollbar.triggerAction(QScrollBar.SliderAction.SliderPageStepAdd)
+                return True
+            if key == Qt.Key.Key_PageUp:
+                self.scrollbar.triggerAction(QScrollBar.SliderAction.SliderPageStepSub)
+                return True
+        return super().eventFilter(obj, event)
@@ -1,8 +1,23 @@
-from PyQt6.QtWidgets import  QInputDialog, QMainWindow,QApplication,QMenuBar,QMenu,QFileDialog,QTextEdit,QHBoxLayout
-from PyQt6.QtGui import QAction, QTextCursor,QColor
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import  QInputDialog, QMainWindow,QApplication,QMenuBar,QMenu,QFileDialog,QTextEdit,QHBoxLayout,QStackedWidget,QMessageBox
+from PyQt6.QtGui import QAction, QTextCursor,QColor,QKeySequence
+from PyQt6.QtCore import Qt,QPoint,QTimer
  
+import os
+import re
 import sys
+from bisect import bisect_left
+
+from follow import FollowView
+from large_file import LargeFileView
+from saving import EditJournal, SaveWorker, read_journal, replay_edits
+from search import SearchWorker, compile_pattern, qt_offsets
+
+# Files bigger than this open in the read-only, memory-mapped large-file view
+LARGE_FILE_BYTES = 20 * 1024 * 1024
+# Edits made since the last save are appended to the journal this often
+AUTOSAVE_MS = 5000
+
+
 class Window(QMainWindow):
  
     def __init__(self):
@@ -12,12 +27,46 @@ class Window(QMainWindow):
     def initUI(self):
         self.setGeometry(0,0,700,500)
         self.current_file = None
+
+        #Find state: (start, end) offsets of every match in the searched buffer
+        self.matches = []
+        self.match_index = -1
+        self.search_worker = None
+        self.to_doc = lambda pos: pos
  
           #Adding the text field for our notepad
         self.edit_field = QTextEdit(self)
+
+        #Large files are shown in a virtualized view instead
+        self.large_view = LargeFileView(self)
+
+        #Growing log files can be followed like tail -f
+        self.follow_view = FollowView(self)
  
         #Create a layout
-        self.setCentralWidget(self.edit_field)
+        self.stack = QStackedWidget(self)
+        self.stack.addWidget(self.edit_field)
+        self.stack.addWidget(self.large_view)
+        self.stack.addWidget(self.follow_view)
+        self.setCentralWidget(self.stack)
+
+        #Only the matches on screen are highlighted, so redo it on scroll
+        self.edit_field.textChanged.connect(self.clear_matches)
+        self.edit_field.verticalScrollBar().valueChanged.connect(self.highlight_visible)
+        self.large_view.refreshed.connect(self.highlight_visible)
+        self.follow_view.verticalScrollBar().valueChanged.connect(self.highlight_visible)
+        self.follow_view.trimmed.connect(self.clear_matches)
+
+        #Saves run on a worker thread, a second save waits for the first
+        self.save_worker = None
+        self.pending_save = None
+
+        #Autosave journal of the edits since the last save
+        self.journal = EditJournal(self.edit_field.document())
+        self.load_journal(None)
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.timeout.connect(self.journal.flush)
+        self.autosave_timer.start(AUTOSAVE_MS)
  
         #creating a menubar
         menubar = QMenuBar(self)
@@ -35,6 +84,10 @@ class Window(QMainWindow):
         open_action = QAction("Open",self)
         fileMenu.addAction(open_action)
         open_action.triggered.connect(self.open_file)
+
+        follow_action = QAction("Follow",self)
+        fileMenu.addAction(follow_action)
+        follow_action.triggered.connect(self.follow_file)
         
         save_as_action = QAction("Save As",self)
         fileMenu.addAction(save_as_action)
@@ -69,67 +122,323 @@ class Window(QMainWindow):
         paste_action.triggered.connect(self.edit_field.paste)
  
         find_action = QAction("Find",self)
+        find_action.setShortcut(QKeySequence.StandardKey.Find)
         editmenu.addAction(find_action)
-        find_action.triggered.connect(self.find_text)
+        find_action.triggered.connect(lambda: self.find_text())
+
+        find_regex_action = QAction("Find Regex",self)
+        editmenu.addAction(find_regex_action)
+        find_regex_action.triggered.connect(lambda: self.find_text(regex=True))
+
+        find_next_action = QAction("Find Next",self)
+        find_next_action.setShortcut(QKeySequence.StandardKey.FindNext)
+        editmenu.addAction(find_next_action)
+        find_next_action.triggered.connect(self.find_next)
+
+        find_previous_action = QAction("Find Previous",self)
+        find_previous_action.setShortcut(QKeySequence.StandardKey.FindPrevious)
+        editmenu.addAction(find_previous_action)
+        find_previous_action.triggered.connect(self.find_previous)
  
       
  
+    def is_large_mode(self):
+        return self.stack.currentWidget() is self.large_view
+
+    def is_follow_mode(self):
+        return self.stack.currentWidget() is self.follow_view
+
+    def text_widget(self):
+        #The widget that find works on, unless in large-file mode
+        return self.follow_view if self.is_follow_mode() else self.edit_field
+
     def open_file(self):
         file_path,_ = QFileDialog.getOpenFileName(self,"Open File","","All Files (*);; Python Files (*.py)")
-        with open(file_path,"r") as fp:
-            self.current_file=file_path
-            text = fp.read()
-            self.edit_field.setText(text)
+        if not file_path:
+            return
+        self.clear_matches()
+        self.finish_save()
+        if os.path.getsize(file_path) > LARGE_FILE_BYTES:
+            self.open_large_file(file_path)
+        else:
+            self.large_view.close_file()
+            self.follow_view.stop()
+            try:
+                # Strict: saving must never write back replaced bytes
+                with open(file_path,"r",encoding="utf-8") as fp:
+                    text = fp.read()
+            except UnicodeDecodeError:
+                #Not UTF-8: show it read-only, "Save As" copies the bytes unchanged
+                self.open_large_file(file_path)
+                self.setWindowTitle(f"{os.path.basename(file_path)} (not UTF-8, read-only)")
+                QMessageBox.warning(self, "Not UTF-8",
+                                    f"{file_path} is not UTF-8 text, it is opened read-only.")
+            else:
+                self.edit_field.setText(text)
+                self.stack.setCurrentWidget(self.edit_field)
+                self.setWindowTitle("")
+                self.load_journal(file_path)
+        self.current_file=file_path
         
         print(file_path)
+
+    def open_large_file(self, file_path):
+        #Memory-map the file and show only the visible lines (read-only)
+        self.clear_matches()
+        self.finish_save()
+        self.journal.stop()
+        self.edit_field.clear()
+        self.follow_view.stop()
+        self.large_view.open(file_path)
+        self.stack.setCurrentWidget(self.large_view)
+        self.setWindowTitle(f"{os.path.basename(file_path)} (large file, read-only)")
+
+    def follow_file(self):
+        #Show the end of a file and keep appending what gets written to it
+        file_path,_ = QFileDialog.getOpenFileName(self,"Follow File","","All Files (*);; Log Files (*.log)")
+        if not file_path:
+            return
+        self.clear_matches()
+        self.finish_save()
+        self.journal.stop()
+        self.edit_field.clear()
+        self.large_view.close_file()
+        self.follow_view.follow(file_path)
+        self.stack.setCurrentWidget(self.follow_view)
+        self.setWindowTitle(f"{os.path.basename(file_path)} (following)")
+        self.current_file=file_path
        
     def new_file(self):
+        self.clear_matches()
+        self.finish_save()
+        self.large_view.close_file()
+        self.follow_view.stop()
+        self.stack.setCurrentWidget(self.edit_field)
+        self.setWindowTitle("")
         self.edit_field.clear()
+        self.journal.start(None)
         self.current_file=None
+
+    def load_journal(self, file_path):
+        #Offer to replay edits that were journaled but never saved (crash)
+        edits = read_journal(file_path)
+        self.journal.start(file_path)
+        if edits is None:
+            return
+        name = os.path.basename(file_path) if file_path else "an untitled document"
+        answer = QMessageBox.question(
+            self, "Recover", f"Recover {len(edits)} unsaved edit(s) to {name}?")
+        if answer == QMessageBox.StandardButton.Yes:
+            replay_edits(self.edit_field.document(), edits)
+            self.journal.flush()
  
     def save_file_as(self):
         file_path,_=QFileDialog.getSaveFileName(self,"Save File","","All Files(*);; Python Files(*.py)")
         if file_path:
-            with open(file_path,"w")as file:
-                file.write(self.edit_field.toPlainText())
-            self.current_file=file_path
+            if self.is_large_mode() or self.is_follow_mode():
+                #Large and followed files are read-only, "Save As" copies the file on disk
+                self.start_save(file_path, source=self.current_file)
+            else:
+                self.start_save(file_path)
  
     def save_file(self):
+        if self.is_large_mode() or self.is_follow_mode():
+            return  # read-only view, nothing to save
         if self.current_file:
-            with open(self.current_file,"w") as file:
-                file.write(self.edit_field.toPlainText())
+            self.start_save(self.current_file)
         else:
             self.save_file_as()
+
+    def start_save(self, file_path, source=None):
+        #Snapshot the text here, write and rename it on a worker thread
+        if self.save_worker is not None:
+            self.pending_save = (file_path, source)
+            return
+        text = None if source else self.edit_field.toPlainText()
+        worker = SaveWorker(file_path, text, source, parent=self)
+        worker.mark = self.journal.mark()
+        worker.finished.connect(lambda: self.on_save_finished(worker))
+        self.save_worker = worker
+        self.statusBar().showMessage(f"Saving {file_path}...")
+        worker.start()
+
+    def on_save_finished(self, worker):
+        if worker is not self.save_worker:
+            return  # already handled by finish_save
+        self.save_worker = None
+        if worker.error:
+            self.statusBar().showMessage("Save failed")
+            QMessageBox.warning(self, "Save failed", worker.error)
+        else:
+            if worker.text is not None:
+                self.journal.saved(worker.path, worker.mark)
+            self.current_file = worker.path
+            self.statusBar().showMessage(f"Saved {worker.path}", 3000)
+        worker.text = None
+        if self.pending_save:
+            file_path, source = self.pending_save
+            self.pending_save = None
+            self.start_save(file_path, source)
+
+    def finish_save(self):
+        #Block until running and queued saves are done (before switching files)
+        while self.save_worker is not None:
+            worker = self.save_worker
+            worker.wait()
+            self.on_save_finished(worker)
  
-    def find_text(self):
+    def find_text(self, regex=False):
         #first display the input dialouge and get the search text from it
-        search_text, ok= QInputDialog.getText(self,"Find Text","Search for")
+        title = "Find Regex" if regex else "Find Text"
+        search_text, ok= QInputDialog.getText(self,title,"Search for")
         #if user clicks ok, begin the search
-        if ok:
-            #this list is used to store inofrmation about the selected text for highliting
-            all_words = []
-            # set the cursor to the beignning of the edit field, this ensures the search
-            # starts from beginning
-            self.edit_field.moveCursor(QTextCursor.MoveOperation.Start)
-            #set the highlught color
-            highlight_color = QColor(Qt.GlobalColor.yellow)
- 
-            #Loop through all the edit field text and find the search_text
-            while(self.edit_field.find(search_text)):
-                # This creates instance of QTextEdit.Extraselection which is used to define
-                # the formatting and location of highligted text
-                selection = QTextEdit.ExtraSelection()
-                # Sets background color of selection
-                selection.format.setBackground(highlight_color)
- 
-                # adds selection to text
-                selection.cursor = self.edit_field.textCursor()
-                all_words.append(selection)
- 
-            self.edit_field.setExtraSelections(all_words)
- 
-    
- 
+        if ok and search_text:
+            self.start_search(search_text, regex)
+
+    def start_search(self, search_text, regex=False):
+        #The buffer is scanned on a worker thread, matches arrive in batches
+        self.clear_matches()
+        large = self.is_large_mode()
+        try:
+            pattern = compile_pattern(search_text, regex, binary=large)
+        except re.error as error:
+            self.statusBar().showMessage(f"Invalid pattern: {error}")
+            return
+        if large:
+            #Search the memory-mapped bytes, offsets are byte offsets
+            buffer = self.large_view.index.data
+            self.to_doc = lambda pos: pos
+        else:
+            buffer = self.text_widget().toPlainText()
+            self.to_doc = qt_offsets(buffer)
+
+        self.statusBar().showMessage("Searching...")
+        self.search_worker = SearchWorker(buffer, pattern, self)
+        self.search_worker.found.connect(self.on_found)
+        self.search_worker.finished.connect(self.on_search_finished)
+        self.search_worker.start()
+
+    def stop_search(self):
+        if self.search_worker is not None:
+            self.search_worker.requestInterruption()
+            self.search_worker.wait()
+            self.search_worker = None
+
+    def clear_matches(self):
+        self.stop_search()
+        if self.matches:
+            self.matches = []
+            self.match_index = -1
+            self.edit_field.setExtraSelections([])
+            self.follow_view.setExtraSelections([])
+            self.large_view.text_view.setExtraSelections([])
+            self.statusBar().clearMessage()
+
+    def on_found(self, batch):
+        if self.sender() is not self.search_worker:
+            return  # batch from a search that was cancelled
+        first = not self.matches
+        self.matches.extend(batch)
+        if first:
+            self.match_index = 0
+            self.show_match()
+        else:
+            self.show_count()
+
+    def on_search_finished(self):
+        if self.sender() is not self.search_worker:
+            return
+        self.search_worker = None
+        if self.matches:
+            self.show_count()
+        else:
+            self.statusBar().showMessage("No matches")
+
+    def show_count(self):
+        more = "+" if self.search_worker is not None else ""
+        self.statusBar().showMessage(
+            f"Match {self.match_index + 1} of {len(self.matches)}{more}")
+
+    def find_next(self):
+        if self.matches:
+            self.match_index = (self.match_index + 1) % len(self.matches)
+            self.show_match()
+
+    def find_previous(self):
+        if self.matches:
+            self.match_index = (self.match_index - 1) % len(self.matches)
+            self.show_match()
+
+    def show_match(self):
+        #Move the view to the current match, highlight_visible does the rest
+        start, end = self.matches[self.match_index]
+        if self.is_large_mode():
+            view = self.large_view
+            line = view.index.line_of_offset(start)
+            if line is not None and not (
+                    view.top_line <= line < view.top_line + view.visible_lines()):
+                view.scroll_to_line(max(0, line - view.visible_lines() // 2))
+        else:
+            cursor = self.text_widget().textCursor()
+            cursor.setPosition(self.to_doc(start))
+            cursor.setPosition(self.to_doc(end), QTextCursor.MoveMode.KeepAnchor)
+            self.text_widget().setTextCursor(cursor)
+        self.highlight_visible()
+        self.show_count()
+
+    def highlight_visible(self):
+        #Build ExtraSelections only for the matches inside the viewport
+        if not self.matches:
+            return
+        large = self.is_large_mode()
+        if large:
+            #byte offsets of the visible lines, mapped into the small view
+            view = self.large_view.text_view
+            first, last = self.large_view.visible_byte_range()
+            position = lambda pos: pos
+            to_view = self.large_view.document_position
+        else:
+            view = self.text_widget()
+            viewport = view.viewport()
+            #hit-test just inside the document margin, the margin itself is unreliable
+            margin = int(view.document().documentMargin())
+            first = view.cursorForPosition(QPoint(margin, margin)).position()
+            last = view.cursorForPosition(QPoint(viewport.width() - 1, viewport.height() - 1)).position()
+            position = to_view = self.to_doc
+
+        highlight_color = QColor(Qt.GlobalColor.yellow)
+        current_color = QColor(255, 165, 0)
+        selections = []
+        i = bisect_left(self.matches, first, key=lambda m: position(m[1]))
+        while i < len(self.matches) and position(self.matches[i][0]) <= last:
+            start, end = self.matches[i]
+            if large:
+                start, end = max(start, first), min(end, last)
+            # This creates instance of QTextEdit.Extraselection which is used to define
+            # the formatting and location of highligted text
+            selection = QTextEdit.ExtraSelection()
+            color = current_color if i == self.match_index else highlight_color
+            selection.format.setBackground(color)
+            cursor = QTextCursor(view.document())
+            cursor.setPosition(to_view(start))
+            cursor.setPosition(to_view(end), QTextCursor.MoveMode.KeepAnchor)
+            selection.cursor = cursor
+            selections.append(selection)
+            i += 1
+        view.setExtraSelections(selections)
+
+    def closeEvent(self, event):
+        self.stop_search()
+        self.finish_save()
+        #Unsaved edits stay in the journal and are offered back next time
+        if self.journal.edits:
+            self.journal.flush()
+        else:
+            self.journal.discard()
+        self.large_view.close_file()
+        self.follow_view.stop()
+        super().closeEvent(event)
+
 app = QApplication(sys.argv)
 window = Window()
 window.show()
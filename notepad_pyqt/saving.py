@@ -0,0 +1,235 @@
+"""
+Saving for the notepad.
+
+Saves run on a worker thread from a snapshot of the text taken on the
+GUI thread. The snapshot goes to a temporary file in the same directory,
+is flushed to disk and then renamed over the original, so a crash during
+a save leaves either the old file or the new one, never a truncated one.
+
+Between saves an autosave journal keeps the edits themselves (position,
+characters removed, text inserted) and appends them to a small file every
+few seconds, so autosaving costs as much as the edits, not the whole
+document. After a crash the journal is replayed on top of the last saved
+file.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from PyQt6.QtCore import QThread
+from PyQt6.QtGui import QTextCursor
+
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".notepad_pyqt", "journal")
+
+# New files get the usual permissions, not the 0600 of mkstemp
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def atomic_save(path, text=None, source=None, encoding="utf-8"):
+    """Write text (or a copy of the file source) to path atomically"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with (os.fdopen(fd, "wb") if text is None
+              else os.fdopen(fd, "w", encoding=encoding)) as fp:
+            if text is None:
+                with open(source, "rb") as src:
+                    shutil.copyfileobj(src, fp, 1 << 20)
+            else:
+                fp.write(text)
+            fp.flush()
+            os.fsync(fp.fileno())
+        try:
+            shutil.copymode(path, tmp_path)  # keep the permissions of the old file
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+
+def _fsync_dir(directory):
+    # Make the rename itself durable (not possible on Windows)
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SaveWorker(QThread):
+    """Runs atomic_save off the GUI thread; error is set if it failed"""
+
+    def __init__(self, path, text=None, source=None, encoding="utf-8", parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.text = text
+        self.source = source
+        self.encoding = encoding
+        self.error = None
+
+    def run(self):
+        # An exception escaping run() would abort the application
+        try:
+            atomic_save(self.path, self.text, self.source, self.encoding)
+        except (OSError, UnicodeError) as error:
+            self.error = str(error)
+
+
+def journal_path(path):
+    """Journal file for a document (path None is the untitled document)"""
+    key = os.path.abspath(path) if path else "untitled"
+    name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(JOURNAL_DIR, name + ".journal")
+
+
+def _file_stamp(path):
+    # Size and mtime identify the saved file a journal applies to
+    if not path:
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _utf16_len(text):
+    # Qt document positions count UTF-16 code units
+    return len(text.encode("utf-16-le")) // 2
+
+
+def read_journal(path):
+    """Edits left in the journal of path, or None if there are none
+
+    A journal written against a different version of the file (it was
+    changed on disk since) is ignored.
+    """
+    try:
+        with open(journal_path(path), encoding="utf-8") as fp:
+            lines = fp.read().splitlines()
+    except FileNotFoundError:
+        return None
+    try:
+        header = json.loads(lines[0])
+        if header["path"] != path or header["stamp"] != _file_stamp(path):
+            return None
+    except (IndexError, KeyError, ValueError, OSError):
+        return None
+    edits = []
+    for line in lines[1:]:
+        try:
+            edits.append(json.loads(line))
+        except ValueError:
+            break  # the last line may be cut short by a crash
+    return edits or None
+
+
+def replay_edits(document, edits):
+    """Apply journal edits to a QTextDocument"""
+    cursor = QTextCursor(document)
+    for position, removed, inserted in edits:
+        cursor.setPosition(position)
+        cursor.setPosition(position + removed, QTextCursor.MoveMode.KeepAnchor)
+        cursor.insertText(inserted)
+
+
+class EditJournal:
+    """Records the edits made to a QTextDocument since the last save"""
+
+    def __init__(self, document):
+        self.document = document
+        self.path = None      # saved file the edits apply to (None if untitled)
+        self.stamp = None
+        self.edits = []       # [position, removed, inserted] since the last save
+        self.written = 0      # how many of them are in the journal file
+        self.sealed = 0       # edits before this index are never merged into
+        self.enabled = False
+        self.file = None
+        document.contentsChange.connect(self._record)
+
+    def start(self, path):
+        """Start an empty journal for path, whose contents were just loaded"""
+        self.enabled = True
+        self.path = path
+        self.stamp = _file_stamp(path)
+        self.edits = []
+        self._rewrite()
+
+    def stop(self):
+        """Stop recording (the editor is not in use) and drop the journal"""
+        self.discard()
+        self.enabled = False
+
+    def _record(self, position, removed, added):
+        if not self.enabled:
+            return
+        end = min(position + added, self.document.characterCount() - 1)
+        cursor = QTextCursor(self.document)
+        cursor.setPosition(position)
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        inserted = cursor.selectedText().replace("\u2029", "\n")
+
+        # Typing a word is one edit, not one per keystroke
+        if len(self.edits) > max(self.written, self.sealed) and not removed:
+            last = self.edits[-1]
+            if last[0] + _utf16_len(last[2]) == position:
+                last[2] += inserted
+                return
+        self.edits.append([position, removed, inserted])
+
+    def flush(self):
+        """Append the edits made since the last flush to the journal file"""
+        if not self.enabled or self.written == len(self.edits):
+            return
+        if self.written == 0:
+            self._rewrite()
+            return
+        with open(self.file, "a", encoding="utf-8") as fp:
+            for edit in self.edits[self.written:]:
+                fp.write(json.dumps(edit) + "\n")
+            fp.flush()
+            os.fsync(fp.fileno())
+        self.written = len(self.edits)
+
+    def mark(self):
+        """Position in the journal of a snapshot that is about to be saved"""
+        self.sealed = len(self.edits)
+        return self.sealed
+
+    def saved(self, path, mark):
+        """The snapshot taken at mark is now on disk as path"""
+        self.path = path
+        self.stamp = _file_stamp(path)
+        self.edits = self.edits[mark:]
+        self._rewrite()
+
+    def discard(self):
+        self.edits = []
+        self._rewrite()
+
+    def _rewrite(self):
+        # Replace the journal file with a header and every pending edit
+        new_file = journal_path(self.path)
+        if self.file and self.file != new_file and os.path.exists(self.file):
+            os.unlink(self.file)
+        self.file = new_file
+        self.written = self.sealed = len(self.edits)
+        if not self.edits:
+            if os.path.exists(self.file):
+                os.unlink(self.file)
+            return
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        lines = [json.dumps({"path": self.path, "stamp": self.stamp})]
+        lines += [json.dumps(edit) for edit in self.edits]
+        tmp_path = self.file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            fp.write("\n".join(lines) + "\n")
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, self.file)
@@ -0,0 +1,80 @@
+"""
+Background find for the notepad.
+
+The whole buffer (a text snapshot of the editor, or the memory-mapped
+bytes of a large file) is scanned with one compiled regular expression
+on a worker thread. The buffer is scanned in chunks of about 1 MB that
+end on a line break, so the thread lets go of the GIL regularly and
+match offsets are streamed back as they are found: the match count grows
+while the scan runs and the first match can be shown right away. A
+regex that spans a line break is only found inside one chunk.
+
+Several terms can be searched at once by joining them with "|" in regex
+mode.
+"""
+import re
+from bisect import bisect_left
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+# Matches are sent to the GUI thread in batches of this size
+BATCH_SIZE = 2000
+# Approximate number of characters (or bytes) scanned per chunk
+CHUNK_SIZE = 1 << 20
+
+_ASTRAL = re.compile("[\U00010000-\U0010FFFF]")
+
+
+def compile_pattern(text, regex=False, binary=False):
+    """Compile the search text (case-insensitive, like QTextEdit.find)"""
+    source = text if regex else re.escape(text)
+    if binary:
+        return re.compile(source.encode("utf-8"), re.IGNORECASE)
+    return re.compile(source, re.IGNORECASE)
+
+
+def qt_offsets(text):
+    """Return a function mapping Python str offsets to Qt document positions
+
+    Qt counts UTF-16 code units, so every character outside the BMP before
+    an offset shifts it by one.
+    """
+    if text.isascii():
+        return lambda pos: pos
+    astral = [m.start() for m in _ASTRAL.finditer(text)]
+    if not astral:
+        return lambda pos: pos
+    return lambda pos: pos + bisect_left(astral, pos)
+
+
+class SearchWorker(QThread):
+    """Scans a buffer with a compiled pattern and streams (start, end) pairs"""
+
+    found = pyqtSignal(list)
+
+    def __init__(self, buffer, pattern, parent=None):
+        super().__init__(parent)
+        self.buffer = buffer
+        self.pattern = pattern
+
+    def run(self):
+        buffer = self.buffer
+        newline = "\n" if isinstance(buffer, str) else b"\n"
+        size = len(buffer)
+        pos = 0
+        while pos < size:
+            if self.isInterruptionRequested():
+                return
+            end = buffer.find(newline, min(pos + CHUNK_SIZE, size))
+            end = size if end == -1 else end + 1
+            batch = []
+            for match in self.pattern.finditer(buffer, pos, end):
+                if match.end() == match.start():
+                    continue  # empty regex matches cannot be highlighted
+                batch.append(match.span())
+                if len(batch) >= BATCH_SIZE:
+                    self.found.emit(batch)
+                    batch = []
+            if batch:
+                self.found.emit(batch)
+            pos = end
@@ -1,18 +1,19 @@
 """
 Enhanced QR Code Generator App (Tkinter)
-Uses: pyqrcode + pypng + Pillow
+Uses: pyqrcode + Pillow (rendering core in qr_engine.py)
 
 Features:
 - Enter text/URL and generate a QR code
 - Preview inside the app with better quality
-- Save as PNG with custom filename
+- Live preview while typing (rendered on a background thread)
+- Save as PNG, BMP or SVG (vector) with custom filename
 - Configurable scale, border, and error correction
 - Copy to clipboard (platform-specific)
 - Keyboard shortcuts for common actions
 - Better error handling and user feedback
 
 Dependencies:
-    pip install pyqrcode pypng pillow
+    pip install pyqrcode pillow
     # Optional for Windows clipboard: pip install pywin32
 
 Run:
@@ -20,13 +21,30 @@ Run:
 """
 import io
 import os
+import queue
+import subprocess
 import sys
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
-import pyqrcode
 from PIL import Image, ImageTk
 
+from qr_engine import QRRenderer, qr_matrix, write_svg
+
+# Live preview timing (milliseconds)
+PREVIEW_DEBOUNCE_MS = 250
+RESULT_POLL_MS = 30
+
+# Largest preview shown in the window
+PREVIEW_MAX_SIZE = (450, 300)
+
+# Images above this many pixels are encoded straight into the target file
+# or pipe instead of being kept in memory as encoded bytes
+STREAM_EXPORT_PIXELS = 4096 * 4096
+
+SAVE_FORMATS = {'.png': 'PNG', '.bmp': 'BMP', '.svg': 'SVG'}
+
 
 class QRApp(tk.Tk):
     """Main QR Code Generator Application"""
@@ -41,8 +59,27 @@ class QRApp(tk.Tk):
         self.qr_image = None
         self.tk_image = None
 
+        # Rendering core caches the QR matrix and the last image
+        self.renderer = QRRenderer()
+        self.qr_params = None
+
+        # Encoded bytes of the current image, per format (reset on generation)
+        self._encoded = {}
+
+        # Background rendering: only the newest request (highest sequence
+        # number) is ever shown, older results are dropped
+        self._render_seq = 0
+        self._shown_seq = 0
+        self._debounce_id = None
+        self._polling = False
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._worker = threading.Thread(target=self._render_worker, daemon=True)
+        self._worker.start()
+
         self._build_ui()
         self._bind_shortcuts()
+        self._bind_live_preview()
 
     def _build_ui(self):
         """Build the user interface"""
@@ -184,7 +221,7 @@ class QRApp(tk.Tk):
 
         help_text2 = ttk.Label(
             help_frame,
-            text="For SVG output, use: pyqrcode.create(data).svg(filename)",
+            text="Save with a .svg extension for vector output",
             foreground='#888',
             font=('TkDefaultFont', 8)
         )
@@ -200,81 +237,178 @@ class QRApp(tk.Tk):
         self.bind('<Control-C>', lambda e: self.copy_to_clipboard())
         self.bind('<Return>', lambda e: self.generate_qr())
 
+    def _bind_live_preview(self):
+        """Re-render the preview (debounced) whenever an input changes"""
+        for var in (self.text_var, self.scale_var,
+                    self.border_var, self.error_var):
+            var.trace_add('write', self._schedule_preview)
+
+    def _schedule_preview(self, *_):
+        """Restart the debounce timer for the live preview"""
+        if self._debounce_id is not None:
+            self.after_cancel(self._debounce_id)
+        self._debounce_id = self.after(
+            PREVIEW_DEBOUNCE_MS, self._submit_render, False)
+
+    def _read_params(self):
+        """Read and validate (data, error_level, scale, border) from the UI"""
+        try:
+            scale = max(1, int(self.scale_var.get()))
+            border = max(0, int(self.border_var.get()))
+        except tk.TclError as e:
+            raise ValueError(e) from None
+        error_level = self.error_var.get()[0]  # Get 'L', 'M', 'Q', or 'H'
+        return self.text_var.get().strip(), error_level, scale, border
+
     def generate_qr(self):
         """Generate QR code from input text"""
-        data = self.text_var.get().strip()
+        if self._debounce_id is not None:
+            self.after_cancel(self._debounce_id)
+            self._debounce_id = None
 
-        if not data:
+        if not self.text_var.get().strip():
             self.status_var.set("⚠️ Please enter text or URL to encode")
             messagebox.showinfo(
                 "No Data", "Please enter text or URL to encode.")
             return
 
-        try:
-            # Validate and get parameters
-            scale = max(1, int(self.scale_var.get()))
-            border = max(0, int(self.border_var.get()))
-            error_level = self.error_var.get()[0]  # Get 'L', 'M', 'Q', or 'H'
+        self._submit_render(True)
 
-            self.status_var.set("🔄 Generating QR code...")
-            self.update_idletasks()
-
-            # Create QR code
-            qr = pyqrcode.create(data, error=error_level)
-
-            # Render to PNG in memory
-            buf = io.BytesIO()
-            qr.png(
-                buf,
-                scale=scale,
-                module_color=[0, 0, 0, 255],
-                background=[255, 255, 255, 255],
-                quiet_zone=border
-            )
-            buf.seek(0)
-
-            # Load as PIL image
-            pil_img = Image.open(buf).convert('RGBA')
-
-            # Store reference and display
-            self.qr_image = pil_img
-            self._show_image(pil_img)
-
-            # Update status
-            size = f"{pil_img.width}×{pil_img.height}"
-            self.status_var.set(
-                f"✅ QR code generated successfully ({size} pixels)")
+    def _submit_render(self, explicit):
+        """Queue a render of the current inputs on the background worker"""
+        self._debounce_id = None
 
+        try:
+            params = self._read_params()
         except ValueError as e:
-            error_msg = f"Invalid parameter value: {e}"
             self.status_var.set("❌ Generation failed")
-            messagebox.showerror("Invalid Input", error_msg)
+            if explicit:
+                messagebox.showerror(
+                    "Invalid Input", f"Invalid parameter value: {e}")
+            return
 
-        except Exception as e:
-            error_msg = f"Failed to generate QR code:\n{type(e).__name__}: {e}"
+        if not params[0]:
+            self.status_var.set("Ready")
+            return
+
+        # Nothing to do if the parameters haven't changed
+        if params == self.qr_params and self._shown_seq == self._render_seq:
+            return
+
+        self._render_seq += 1
+        self._jobs.put((self._render_seq, params, explicit))
+        self.status_var.set("🔄 Generating QR code...")
+
+        if not self._polling:
+            self._polling = True
+            self.after(RESULT_POLL_MS, self._poll_results)
+
+    def _render_worker(self):
+        """Worker thread: render QR codes and their previews"""
+        while True:
+            job = self._jobs.get()
+            # Skip straight to the newest request
+            while not self._jobs.empty():
+                job = self._jobs.get_nowait()
+
+            seq, params, explicit = job
+            if seq != self._render_seq:
+                continue
+
+            try:
+                # Create QR code (rasterized directly, no PNG round-trip)
+                pil_img = self.renderer.render(*params)
+                preview = self._preview_image(pil_img)
+                self._results.put((seq, params, explicit, pil_img, preview, None))
+            except Exception as e:
+                self._results.put((seq, params, explicit, None, None, e))
+
+    def _poll_results(self):
+        """Pick up finished renders on the Tk thread, dropping stale ones"""
+        while not self._results.empty():
+            result = self._results.get_nowait()
+            if result[0] == self._render_seq:
+                self._shown_seq = result[0]
+                self._apply_result(*result[1:])
+
+        if self._shown_seq != self._render_seq:
+            self.after(RESULT_POLL_MS, self._poll_results)
+        else:
+            self._polling = False
+
+    def _apply_result(self, params, explicit, pil_img, preview, error):
+        """Show a finished render (Tk thread only)"""
+        if error is not None:
             self.status_var.set("❌ Generation failed")
-            messagebox.showerror("Error", error_msg)
+            if explicit:
+                error_msg = f"Failed to generate QR code:\n{type(error).__name__}: {error}"
+                messagebox.showerror("Error", error_msg)
+            return
 
-    def _show_image(self, pil_img):
-        """Display QR code image in preview canvas"""
-        # Calculate preview size
-        max_w, max_h = 450, 300
+        # Store reference and display
+        self.qr_image = pil_img
+        self.qr_params = params
+        self._encoded = {}
+        self._show_image(preview)
+
+        # Update status
+        size = f"{pil_img.width}×{pil_img.height}"
+        self.status_var.set(
+            f"✅ QR code generated successfully ({size} pixels)")
+
+    @staticmethod
+    def _preview_image(pil_img):
+        """Scale a QR code image down to fit the preview area"""
+        max_w, max_h = PREVIEW_MAX_SIZE
         w, h = pil_img.size
         scale = min(max_w / w, max_h / h, 1.0)
 
         if scale < 1.0:
             # Resize for preview (use NEAREST to keep QR code sharp)
             new_size = (int(w * scale), int(h * scale))
-            display_img = pil_img.resize(new_size, Image.NEAREST)
-        else:
-            display_img = pil_img
+            return pil_img.resize(new_size, Image.NEAREST)
+        return pil_img
 
-        # Update canvas
+    def _show_image(self, display_img):
+        """Display a preview-sized image in the preview canvas"""
         self.tk_image = ImageTk.PhotoImage(display_img)
         self.canvas.config(image=self.tk_image, text="")
 
+    def _encoded_bytes(self, fmt):
+        """Return the current image encoded as PNG or BMP (cached)"""
+        if fmt not in self._encoded:
+            img = self.qr_image.convert('RGB') if fmt == 'BMP' else self.qr_image
+            buf = io.BytesIO()
+            img.save(buf, format=fmt)
+            self._encoded[fmt] = buf.getvalue()
+        return self._encoded[fmt]
+
+    def _write_image(self, fp, fmt):
+        """Write the current image to a binary file object or pipe"""
+        if fmt == 'SVG':
+            # Vector output straight from the module matrix, no raster
+            data, error_level, scale, border = self.qr_params
+            text = io.TextIOWrapper(fp, encoding='utf-8', write_through=True)
+            write_svg(qr_matrix(data, error_level), text, scale, border)
+            text.detach()
+        elif (fmt not in self._encoded and
+                self.qr_image.width * self.qr_image.height > STREAM_EXPORT_PIXELS):
+            # Too large to keep around, encode directly into the target
+            img = self.qr_image.convert('RGB') if fmt == 'BMP' else self.qr_image
+            img.save(fp, format=fmt)
+        else:
+            fp.write(self._encoded_bytes(fmt))
+
+    def _pipe_image(self, cmd, fmt):
+        """Stream the current image into a command's stdin"""
+        with subprocess.Popen(cmd, stdin=subprocess.PIPE) as proc:
+            self._write_image(proc.stdin, fmt)
+            proc.stdin.close()
+        if proc.returncode:
+            raise OSError(f"{cmd[0]} exited with status {proc.returncode}")
+
     def save_png(self):
-        """Save QR code as PNG file"""
+        """Save QR code as PNG, BMP or SVG file"""
         if self.qr_image is None:
             self.status_var.set("⚠️ Generate a QR code first")
             messagebox.showinfo("No Image", "Generate a QR code first.")
@@ -285,6 +419,8 @@ class QRApp(tk.Tk):
             defaultextension='.png',
             filetypes=[
                 ('PNG files', '*.png'),
+                ('SVG files', '*.svg'),
+                ('BMP files', '*.bmp'),
                 ('All files', '*.*')
             ],
             title="Save QR Code"
@@ -293,8 +429,11 @@ class QRApp(tk.Tk):
         if not path:
             return
 
+        fmt = SAVE_FORMATS.get(os.path.splitext(path)[1].lower(), 'PNG')
+
         try:
-            self.qr_image.save(path, format='PNG')
+            with open(path, 'wb') as fp:
+                self._write_image(fp, fmt)
             filename = os.path.basename(path)
             self.status_var.set(f"💾 Saved: {filename}")
             messagebox.showinfo("Saved", f"QR code saved to:\n{path}")
@@ -305,7 +444,7 @@ class QRApp(tk.Tk):
                                  "Cannot write to the selected location.")
 
         except Exception as e:
-            error_msg = f"Failed to save PNG:\n{type(e).__name__}: {e}"
+            error_msg = f"Failed to save {fmt}:\n{type(e).__name__}: {e}"
             self.status_var.set("❌ Save failed")
             messagebox.showerror("Error", error_msg)
 
@@ -336,13 +475,7 @@ class QRApp(tk.Tk):
 
     def _copy_to_clipboard_macos(self):
         """Copy to clipboard on macOS"""
-        buf = io.BytesIO()
-        self.qr_image.save(buf, format='PNG')
-        buf.seek(0)
-
-        p = os.popen('pbcopy', 'wb')
-        p.write(buf.read())
-        p.close()
+        self._pipe_image(['pbcopy'], 'PNG')
 
         self.status_var.set("📋 Copied to clipboard (macOS)")
         messagebox.showinfo('Copied', 'QR code image copied to clipboard.')
@@ -351,9 +484,7 @@ class QRApp(tk.Tk):
         """Copy to clipboard on Windows"""
         import win32clipboard
 
-        output = io.BytesIO()
-        self.qr_image.convert('RGB').save(output, format='BMP')
-        data = output.getvalue()[14:]  # Skip BMP file header
+        data = self._encoded_bytes('BMP')[14:]  # Skip BMP file header
 
         win32clipboard.OpenClipboard()
         win32clipboard.EmptyClipboard()
@@ -366,13 +497,8 @@ class QRApp(tk.Tk):
     def _copy_to_clipboard_linux(self):
         """Copy to clipboard on Linux"""
         # Try xclip
-        buf = io.BytesIO()
-        self.qr_image.save(buf, format='PNG')
-        buf.seek(0)
-
-        p = os.popen('xclip -selection clipboard -t image/png', 'wb')
-        p.write(buf.read())
-        p.close()
+        self._pipe_image(
+            ['xclip', '-selection', 'clipboard', '-t', 'image/png'], 'PNG')
 
         self.status_var.set("📋 Copied to clipboard (Linux)")
         messagebox.showinfo('Copied', 'QR code image copied to clipboard.')
@@ -0,0 +1,251 @@
+"""
+Batch QR Code Generator (command line)
+Uses: qr_engine (pyqrcode + Pillow)
+
+Reads payloads from a CSV or JSONL file and renders the QR codes in a
+process pool, using the same scale / border / error correction options
+as the GUI.
+
+Output modes:
+- png:   one PNG file per payload in the output directory
+- sheet: a single tiled PNG sheet with every code
+- pdf:   a multi-page PDF of tiled sheets on A4 or Letter paper, ready
+         for printing (written page by page, so memory does not grow with
+         the number of codes)
+
+Examples:
+    python qr_batch.py labels.csv -o out/ --column url
+    python qr_batch.py labels.jsonl -o labels.png --mode sheet --columns 20
+    python qr_batch.py labels.jsonl -o labels.pdf --mode pdf --per-page 48 --page-size letter
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from qr_engine import ERROR_LEVELS, LIGHT, qr_matrix, render_matrix
+
+# PDF paper sizes in points (1/72 inch)
+PAGE_SIZES = {'a4': (595, 842), 'letter': (612, 792)}
+PAGE_MARGIN = 36
+
+
+def read_payloads(path, field=None):
+    """Read payload strings from a CSV or JSONL file"""
+    payloads = []
+    with open(path, newline='', encoding='utf-8') as fp:
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            for line in fp:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    record = record[field or 'data']
+                payloads.append(str(record))
+        else:
+            reader = csv.reader(fp)
+            header = next(reader, None)
+            if header is None:
+                return payloads
+            if field is None:
+                # Without a column name there is no header row
+                column = 0
+                if header and header[0]:
+                    payloads.append(header[0])
+            else:
+                column = header.index(field)
+            for row in reader:
+                if len(row) > column and row[column]:
+                    payloads.append(row[column])
+    return payloads
+
+
+def _encode(job):
+    """Worker: encode one payload and return its module matrix"""
+    data, error = job
+    return qr_matrix(data, error)
+
+
+def _render_to_file(job):
+    """Worker: render one payload straight to a PNG file"""
+    data, error, scale, border, path = job
+    render_matrix(qr_matrix(data, error), scale, border).save(path, format='PNG')
+    return path
+
+
+def _tile(matrices, columns, cell, scale, border):
+    """Render module matrices into equally sized cells of one sheet image"""
+    rows = math.ceil(len(matrices) / columns)
+    sheet = Image.new('L', (columns * cell, rows * cell), LIGHT)
+    for idx, matrix in enumerate(matrices):
+        img = render_matrix(matrix, scale, border)
+        offset = (cell - img.width) // 2
+        x = (idx % columns) * cell + offset
+        y = (idx // columns) * cell + offset
+        sheet.paste(img, (x, y))
+    return sheet
+
+
+class _PdfPages:
+    """Minimal PDF writer that appends one black-and-white image per page
+
+    Every page is written to the file as soon as it is added; only the
+    object offsets are kept until close() writes the page tree and the
+    cross-reference table. Sheets are scaled to fit a full sheet of
+    sheet_size pixels inside the margins of the paper, so codes have the
+    same printed size on every page, and drawn from the top left.
+    """
+
+    def __init__(self, path, sheet_size, page_size=PAGE_SIZES['a4'], margin=PAGE_MARGIN):
+        self.page_size = page_size
+        self.margin = margin
+        self.scale = min((page_size[0] - 2 * margin) / sheet_size[0],
+                         (page_size[1] - 2 * margin) / sheet_size[1])
+        self.fp = open(path, 'wb')
+        self.offsets = {}  # object number -> file offset
+        self.pages = []
+        self.fp.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _object(self, number, body, stream=None):
+        self.offsets[number] = self.fp.tell()
+        self.fp.write(b'%d 0 obj\n' % number + body)
+        if stream is not None:
+            self.fp.write(b'\nstream\n' + stream + b'\nendstream')
+        self.fp.write(b'\nendobj\n')
+
+    def add_page(self, img):
+        # Objects 1 (catalog) and 2 (page tree) are written by close()
+        image, content, page = range(3 + 3 * len(self.pages), 6 + 3 * len(self.pages))
+        width, height = img.size
+        data = zlib.compress(img.convert('1').tobytes())
+        self._object(image, b'<< /Type /XObject /Subtype /Image /Width %d /Height %d '
+                            b'/ColorSpace /DeviceGray /BitsPerComponent 1 '
+                            b'/Filter /FlateDecode /Length %d >>'
+                     % (width, height, len(data)), data)
+        # The image is a unit square, cm scales and moves it onto the paper
+        page_width, page_height = self.page_size
+        drawn_width, drawn_height = width * self.scale, height * self.scale
+        draw = b'q %.3f 0 0 %.3f %d %.3f cm /Im0 Do Q' % (
+            drawn_width, drawn_height, self.margin, page_height - self.margin - drawn_height)
+        self._object(content, b'<< /Length %d >>' % len(draw), draw)
+        self._object(page, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                           b'/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>'
+                     % (page_width, page_height, image, content))
+        self.pages.append(page)
+
+    def close(self):
+        kids = b' '.join(b'%d 0 R' % page for page in self.pages)
+        self._object(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self.pages)))
+        self._object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        xref = self.fp.tell()
+        self.fp.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(self.offsets) + 1))
+        for number in range(1, len(self.offsets) + 1):
+            self.fp.write(b'%010d 00000 n \n' % self.offsets[number])
+        self.fp.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                      % (len(self.offsets) + 1, xref))
+        self.fp.close()
+
+
+def generate(payloads, output, mode='png', error='M', scale=8, border=4,
+             columns=10, per_page=40, page_size='a4', workers=None):
+    """Generate QR codes for all payloads and return the number written"""
+    chunksize = max(1, len(payloads) // ((workers or os.cpu_count() or 1) * 8))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if mode == 'png':
+            os.makedirs(output, exist_ok=True)
+            digits = len(str(len(payloads)))
+            jobs = [
+                (data, error, scale, border,
+                 os.path.join(output, f"qr_{idx:0{digits}d}.png"))
+                for idx, data in enumerate(payloads)
+            ]
+            for _ in pool.map(_render_to_file, jobs, chunksize=chunksize):
+                pass
+            return len(jobs)
+
+        # Only the module matrices (one byte per module) come back from the
+        # workers; pixels exist for one sheet or page at a time
+        jobs = [(data, error) for data in payloads]
+        matrices = list(pool.map(_encode, jobs, chunksize=chunksize))
+
+    if not matrices:
+        return 0
+
+    cell = (max(len(matrix) for matrix in matrices) + 2 * border) * scale
+    if mode == 'sheet':
+        _tile(matrices, columns, cell, scale, border).save(output, format='PNG')
+    else:
+        # Each page is written to the PDF as soon as it is tiled
+        rows = math.ceil(min(per_page, len(matrices)) / columns)
+        pdf = _PdfPages(output, (columns * cell, rows * cell), PAGE_SIZES[page_size])
+        try:
+            for start in range(0, len(matrices), per_page):
+                pdf.add_page(_tile(matrices[start:start + per_page], columns, cell, scale, border))
+        finally:
+            pdf.close()
+    return len(matrices)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Batch QR code generator")
+    parser.add_argument('input', help="CSV or JSONL file with payloads")
+    parser.add_argument('-o', '--output', required=True,
+                        help="output directory (png) or file (sheet/pdf)")
+    parser.add_argument('--mode', choices=['png', 'sheet', 'pdf'], default='png')
+    parser.add_argument('--field', '--column', dest='field',
+                        help="CSV column / JSON key holding the payload")
+    parser.add_argument('--scale', type=int, default=8,
+                        help="pixels per module (default: 8)")
+    parser.add_argument('--border', type=int, default=4,
+                        help="quiet zone in modules (default: 4)")
+    parser.add_argument('--error', choices=ERROR_LEVELS, default='M',
+                        help="error correction level (default: M)")
+    parser.add_argument('--columns', type=int, default=10,
+                        help="codes per row on sheets and pages")
+    parser.add_argument('--per-page', type=int, default=40,
+                        help="codes per PDF page")
+    parser.add_argument('--page-size', choices=sorted(PAGE_SIZES), default='a4',
+                        help="PDF paper size (default: a4)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    try:
+        payloads = read_payloads(args.input, args.field)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Failed to read payloads: {type(e).__name__}: {e}")
+        sys.exit(1)
+
+    if not payloads:
+        print("No payloads found.")
+        return
+
+    start = time.perf_counter()
+    count = generate(
+        payloads, args.output, args.mode,
+        error=args.error,
+        scale=max(1, args.scale),
+        border=max(0, args.border),
+        columns=max(1, args.columns),
+        per_page=max(1, args.per_page),
+        page_size=args.page_size,
+        workers=args.workers,
+    )
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed if elapsed else float('inf')
+    print(f"Generated {count} QR codes in {elapsed:.2f}s ({rate:.0f} codes/sec)")
+
+
+if __name__ == '__main__':
+    main()
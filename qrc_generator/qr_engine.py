@@ -0,0 +1,120 @@
+"""
+QR Code rendering core (no Tkinter)
+Uses: pyqrcode + Pillow (NumPy optional)
+
+The QR module matrix is cached per (data, error level) and rasterized
+straight into a Pillow image, skipping the PNG encode/decode round-trip
+that pyqrcode's png() would need.
+
+Example:
+    renderer = QRRenderer()
+    img = renderer.render("https://example.com", error='M', scale=8, border=4)
+    img.save("qr.png")
+"""
+from functools import lru_cache
+
+import pyqrcode
+from PIL import Image
+
+ERROR_LEVELS = ('L', 'M', 'Q', 'H')
+
+DARK = 0
+LIGHT = 255
+
+
+@lru_cache(maxsize=256)
+def qr_matrix(data, error='M'):
+    """Return the QR module matrix as a tuple of row bytes (1 = dark)"""
+    if error not in ERROR_LEVELS:
+        raise ValueError(f"Unknown error level: {error!r}")
+    qr = pyqrcode.create(data, error=error)
+    return tuple(bytes(row) for row in qr.code)
+
+
+def render_matrix(matrix, scale=8, border=4):
+    """Rasterize a module matrix into a grayscale ('L') Pillow image"""
+    if scale < 1:
+        raise ValueError("scale must be at least 1")
+    if border < 0:
+        raise ValueError("border must not be negative")
+
+    size = len(matrix)
+    side = size + 2 * border
+    # One byte per module, quiet zone included, then scale up in one step
+    light_row = bytes([LIGHT]) * side
+    margin = bytes([LIGHT]) * border
+    to_pixels = bytes.maketrans(b'\x00\x01', bytes([LIGHT, DARK]))
+
+    raw = bytearray(light_row * border)
+    for row in matrix:
+        raw += margin + row.translate(to_pixels) + margin
+    raw += light_row * border
+
+    img = Image.frombytes('L', (side, side), bytes(raw))
+    if scale > 1:
+        img = img.resize((side * scale, side * scale), Image.NEAREST)
+    return img
+
+
+def render_array(matrix, scale=8, border=4):
+    """Rasterize a module matrix into a NumPy uint8 array (requires NumPy)"""
+    try:
+        import numpy as np  # optional and slow to import, QRApp never needs it
+    except ImportError:
+        raise ImportError("numpy is required for render_array()") from None
+    modules = np.frombuffer(b''.join(matrix), dtype=np.uint8)
+    modules = modules.reshape(len(matrix), len(matrix))
+    pixels = np.where(modules, DARK, LIGHT).astype(np.uint8)
+    pixels = np.pad(pixels, border, constant_values=LIGHT)
+    return np.kron(pixels, np.ones((scale, scale), dtype=np.uint8))
+
+
+def write_svg(matrix, fp, scale=8, border=4):
+    """Write a module matrix as an SVG document to a text file object
+
+    Dark modules are emitted as horizontal runs in a single path, one row
+    at a time, so no raster image is ever built.
+    """
+    side = len(matrix) + 2 * border
+    pixels = side * scale
+    fp.write(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" '
+        f'height="{pixels}" viewBox="0 0 {side} {side}" '
+        'shape-rendering="crispEdges">\n'
+        '<rect width="100%" height="100%" fill="#fff"/>\n'
+        '<path fill="#000" d="'
+    )
+    for y, row in enumerate(matrix, start=border):
+        parts = []
+        start = row.find(1)
+        while start != -1:
+            end = row.find(0, start)
+            if end == -1:
+                end = len(row)
+            width = end - start
+            parts.append(f"M{start + border} {y}h{width}v1h-{width}z")
+            start = row.find(1, end)
+        fp.write(''.join(parts))
+    fp.write('"/>\n</svg>\n')
+
+
+class QRRenderer:
+    """Renders QR codes and re-renders only when parameters change"""
+
+    def __init__(self):
+        self._last_key = None
+        self._last_image = None
+
+    def render(self, data, error='M', scale=8, border=4):
+        """Return the QR image for the given parameters (cached)"""
+        key = (data, error, scale, border)
+        if key != self._last_key:
+            matrix = qr_matrix(data, error)
+            self._last_image = render_matrix(matrix, scale, border)
+            self._last_key = key
+        return self._last_image
+
+    def is_current(self, data, error='M', scale=8, border=4):
+        """Check if the last rendered image matches these parameters"""
+        return self._last_key == (data, error, scale, border)
@@ -0,0 +1,104 @@
+"""
+Checks for qr_batch: reading payloads and the PDF writer.
+
+    python -m unittest test_qr_batch
+"""
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image, PdfParser
+
+from qr_batch import PAGE_MARGIN, PAGE_SIZES, _tile, generate, read_payloads
+from qr_engine import qr_matrix
+
+PAYLOADS = [f"https://example.com/item/{i}" for i in range(23)]
+
+
+class ReadPayloadsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_short_csv_rows_are_skipped(self):
+        path = os.path.join(self.directory, "labels.csv")
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.write("id,url\n1,https://a\n2\n\n3,\n4,https://b\n")
+        self.assertEqual(read_payloads(path, "url"), ["https://a", "https://b"])
+
+
+class PdfTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, "labels.pdf")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def generate(self, **kwargs):
+        return generate(PAYLOADS, self.output, mode="pdf", scale=2, border=2,
+                        columns=4, per_page=10, workers=1, **kwargs)
+
+    def read_pages(self):
+        pdf = PdfParser.PdfParser(self.output)
+        self.addCleanup(pdf.close)
+        pages = []
+        for reference in pdf.pages:
+            page = pdf.read_indirect(reference)
+            image = pdf.read_indirect(page[b"Resources"][b"XObject"][b"Im0"])
+            content = pdf.read_indirect(page[b"Contents"]).decode()
+            size = (image.dictionary.Width, image.dictionary.Height)
+            pixels = Image.frombytes("1", size, image.decode()).convert("L")
+            pages.append((page[b"MediaBox"], content, pixels))
+        return pages
+
+    def test_round_trip(self):
+        self.assertEqual(self.generate(), len(PAYLOADS))
+        pages = self.read_pages()
+        self.assertEqual(len(pages), 3)
+
+        matrices = [qr_matrix(data) for data in PAYLOADS]
+        cell = (max(len(matrix) for matrix in matrices) + 4) * 2
+        for number, (_, _, pixels) in enumerate(pages):
+            expected = _tile(matrices[number * 10:number * 10 + 10], 4, cell, 2, 2)
+            self.assertEqual(pixels.size, expected.size)
+            self.assertEqual(pixels.tobytes(), expected.tobytes())
+
+    def test_pages_fit_the_paper(self):
+        for page_size in PAGE_SIZES:
+            self.generate(page_size=page_size)
+            width, height = PAGE_SIZES[page_size]
+            scales = set()
+            for media_box, content, pixels in self.read_pages():
+                self.assertEqual(list(media_box), [0, 0, width, height])
+                match = re.search(rb"q ([\d.]+) 0 0 ([\d.]+) ([\d.]+) ([\d.]+) cm", content)
+                drawn_width, drawn_height, x, y = map(float, match.groups())
+                self.assertGreaterEqual(x, PAGE_MARGIN)
+                self.assertGreaterEqual(y, PAGE_MARGIN - 0.01)
+                self.assertLessEqual(x + drawn_width, width - PAGE_MARGIN + 0.01)
+                self.assertAlmostEqual(y + drawn_height, height - PAGE_MARGIN, places=2)
+                scales.add(round(drawn_width / pixels.width, 6))
+            # Codes are printed at the same size on every page
+            self.assertEqual(len(scales), 1)
+
+    def test_cross_reference_table(self):
+        self.generate()
+        with open(self.output, "rb") as fp:
+            data = fp.read()
+        xref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", data).group(1))
+        lines = data[xref:].split(b"\n")
+        self.assertEqual(lines[0], b"xref")
+        count = int(lines[1].split()[1])
+        for number in range(1, count):
+            offset = int(lines[2 + number].split()[0])
+            self.assertTrue(data.startswith(b"%d 0 obj\n" % number, offset))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,220 @@
+"""
+Vectorized multi-environment snake runner (NumPy).
+
+BatchSnake steps N independent snake games at once. The rules are the
+same as snake_engine.SnakeGame, but all state lives in NumPy arrays:
+
+- head / tail pointers into a per-game ring buffer of body cells
+- an (N, cells) occupancy grid
+- food cell, score, length and alive flags per game
+
+Food comes from a seeded numpy Generator (replacing random.randrange), so
+a batch is reproducible from its seed. evaluate() shards the batch across
+a process pool to use several cores.
+
+Run this file to print steps/sec for N = 1 .. 10,000.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from snake_engine import DIRECTIONS
+
+# Action -1 keeps the current direction; 0..3 are LEFT, RIGHT, UP, DOWN
+KEEP = -1
+_DX = np.array([DIRECTIONS[a][0] for a in range(4)], dtype=np.int32)
+_DY = np.array([DIRECTIONS[a][1] for a in range(4)], dtype=np.int32)
+
+
+class BatchSnake:
+    """N snake games advanced together by step(actions)"""
+
+    def __init__(self, n, cols=80, rows=60, seed=None, auto_reset=True):
+        self.n = n
+        self.cols = cols
+        self.rows = rows
+        self.cells = cols * rows
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+
+        cell_type = np.int16 if self.cells <= np.iinfo(np.int16).max else np.int32
+        self.body = np.zeros((n, self.cells), dtype=cell_type)  # ring buffers
+        self.occupied = np.zeros((n, self.cells), dtype=np.uint8)
+        self.head_ptr = np.zeros(n, dtype=np.int32)
+        self.tail_ptr = np.zeros(n, dtype=np.int32)
+        self.body_len = np.zeros(n, dtype=np.int32)
+        self.length = np.zeros(n, dtype=np.int32)
+        self.dx = np.zeros(n, dtype=np.int32)
+        self.dy = np.zeros(n, dtype=np.int32)
+        self.food = np.zeros(n, dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int32)
+        self.alive = np.ones(n, dtype=bool)
+        self.episodes = 0
+        self._rows = np.arange(n)
+
+        self.reset(np.ones(n, dtype=bool))
+
+    @property
+    def heads(self):
+        return self.body[self._rows, self.head_ptr].astype(np.int32)
+
+    def reset(self, mask):
+        """Start new games for every index where mask is True"""
+        idx = np.flatnonzero(mask)
+        if idx.size == 0:
+            return
+        start = (self.rows // 2) * self.cols + self.cols // 2
+        self.occupied[idx] = 0
+        self.occupied[idx, start] = 1
+        self.body[idx, 0] = start
+        self.head_ptr[idx] = 0
+        self.tail_ptr[idx] = 0
+        self.body_len[idx] = 1
+        self.length[idx] = 1
+        self.dx[idx] = 0  # the snake waits for the first action
+        self.dy[idx] = 0
+        self.score[idx] = 0
+        self.alive[idx] = True
+        self._place_food(idx)
+
+    def _place_food(self, idx):
+        # Rejection-sample free cells, then pick from the free list for the
+        # few games (nearly full boards) that keep missing
+        pending = idx
+        for _ in range(8):
+            if pending.size == 0:
+                return
+            cells = self.rng.integers(0, self.cells, size=pending.size)
+            hit = self.occupied[pending, cells] == 1
+            self.food[pending[~hit]] = cells[~hit]
+            pending = pending[hit]
+        for i in pending:
+            free = np.flatnonzero(self.occupied[i] == 0)
+            if free.size:
+                self.food[i] = self.rng.choice(free)
+            else:
+                self.food[i] = -1
+                self.alive[i] = False  # the snake fills the grid
+
+    def step(self, actions=None):
+        """Advance every live game one tick
+
+        actions is an int array of shape (n,), KEEP (-1) for no change.
+        Returns (rewards, dones): rewards is 1 where food was eaten, dones
+        marks games that ended this tick (reset again when auto_reset).
+        """
+        rows = self._rows
+        if actions is not None:
+            actions = np.asarray(actions)
+            turn = actions >= 0
+            self.dx[turn] = _DX[actions[turn]]
+            self.dy[turn] = _DY[actions[turn]]
+
+        heads = self.body[rows, self.head_ptr].astype(np.int32)
+        x = heads % self.cols + self.dx
+        y = heads // self.cols + self.dy
+        live = self.alive.copy()
+
+        # Check if the snake hits the boundary of the grid
+        inside = (x >= 0) & (x < self.cols) & (y >= 0) & (y < self.rows)
+        dones = live & ~inside
+        moving = live & inside
+        new_heads = np.where(moving, y * self.cols + x, 0)
+
+        # The tail moves out before the head moves in, unless growing
+        shrink = np.flatnonzero(moving & (self.body_len >= self.length))
+        tails = self.body[shrink, self.tail_ptr[shrink]]
+        self.occupied[shrink, tails] = 0
+        self.tail_ptr[shrink] = (self.tail_ptr[shrink] + 1) % self.cells
+        self.body_len[shrink] -= 1
+
+        # Check if snake hits itself
+        crashed = moving & (self.occupied[rows, new_heads] == 1)
+        dones |= crashed
+        moving &= ~crashed
+
+        m = np.flatnonzero(moving)
+        self.head_ptr[m] = (self.head_ptr[m] + 1) % self.cells
+        self.body[m, self.head_ptr[m]] = new_heads[m]
+        self.occupied[m, new_heads[m]] = 1
+        self.body_len[m] += 1
+
+        ate = moving & (new_heads == self.food)
+        rewards = ate.astype(np.int32)
+        eaters = np.flatnonzero(ate)
+        self.score[eaters] += 1
+        self.length[eaters] += 1
+        self._place_food(eaters)
+
+        self.alive &= ~dones
+        dones |= live & ~self.alive  # games that filled the grid
+        if self.auto_reset and dones.any():
+            self.episodes += int(dones.sum())
+            self.reset(dones)
+        return rewards, dones
+
+
+def random_policy(env):
+    """Turn in a random direction 10% of the time"""
+    actions = env.rng.integers(0, 4, size=env.n)
+    actions[env.rng.random(env.n) >= 0.1] = KEEP
+    return actions
+
+
+def _run_shard(args):
+    policy, n, steps, seed, cols, rows = args
+    env = BatchSnake(n, cols, rows, seed=seed)
+    total_score = 0
+    for _ in range(steps):
+        rewards, _ = env.step(policy(env))
+        total_score += int(rewards.sum())
+    return n * steps, env.episodes, total_score
+
+
+def evaluate(policy=random_policy, n=1000, steps=1000, workers=1, seed=0,
+             cols=80, rows=60):
+    """Run n games for steps ticks, split across worker processes
+
+    policy(env) -> actions must be a picklable top-level function.
+    Returns a dict with total steps, finished episodes, food eaten and
+    steps/sec.
+    """
+    workers = max(1, min(workers, n))
+    shards = [len(part) for part in np.array_split(np.arange(n), workers)]
+    jobs = [(policy, size, steps, seed + k, cols, rows)
+            for k, size in enumerate(shards)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_run_shard(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_shard, jobs))
+    elapsed = time.perf_counter() - start
+
+    total_steps = sum(r[0] for r in results)
+    return {
+        "steps": total_steps,
+        "episodes": sum(r[1] for r in results),
+        "food": sum(r[2] for r in results),
+        "steps_per_sec": total_steps / elapsed,
+    }
+
+
+def main():
+    """Print steps/sec for a range of batch sizes"""
+    import os
+    cores = os.cpu_count() or 1
+    for n in (1, 10, 100, 1000, 10000):
+        steps = max(50, 100000 // n)
+        single = evaluate(n=n, steps=steps)
+        line = f"N={n:>6}  {single['steps_per_sec']:>14,.0f} steps/sec"
+        if cores > 1 and n >= 1000:
+            multi = evaluate(n=n, steps=steps, workers=cores)
+            line += f"  {multi['steps_per_sec']:>14,.0f} steps/sec ({cores} processes)"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Headless snake game engine.
+
+The game state and the fixed-timestep step function live here, with no
+pygame dependency, so the logic can run without a display and as fast
+as the CPU allows (AI training, replay testing). snake_game.py is the
+optional pygame layer that feeds keyboard input in and draws the state.
+
+Coordinates are grid cells, not pixels: the default 80 x 60 grid is the
+original 800 x 600 window with 10 pixel blocks. Internally a cell is the
+integer y * cols + x; the body is a deque of cells, backed by a bytearray
+occupancy grid and a list of free cells, so moving, growing, collision
+checks and food placement are all O(1).
+
+    game = SnakeGame(seed=42)
+    game.step(RIGHT)
+    while not game.game_over:
+        game.step()
+"""
+import random
+import time
+from collections import deque
+
+# Actions (None keeps the current direction)
+LEFT, RIGHT, UP, DOWN = range(4)
+ACTIONS = (LEFT, RIGHT, UP, DOWN)
+
+DIRECTIONS = {
+    LEFT: (-1, 0),
+    RIGHT: (1, 0),
+    UP: (0, -1),
+    DOWN: (0, 1),
+}
+
+
+class SnakeGame:
+    """State of one snake game, advanced one tick at a time by step()"""
+
+    def __init__(self, cols=80, rows=60, seed=None):
+        self.cols = cols
+        self.rows = rows
+        self._all_cells = list(range(cols * rows))  # copied on every reset
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Start a new game; the same seed replays the same food positions"""
+        size = self.cols * self.rows
+        self.rng = random.Random(seed)
+        self.direction = (0, 0)  # the snake waits for the first key press
+        self.length = 1
+        self.score = 0
+        self.steps = 0
+        self.game_over = False
+
+        # occupied[cell] is 1 under the snake; free lists every other cell and
+        # free_index[cell] is its position in that list (-1 when occupied)
+        self.occupied = bytearray(size)
+        self.free = self._all_cells.copy()
+        self.free_index = self._all_cells.copy()
+
+        start = self.cell(self.cols // 2, self.rows // 2)
+        self.body = deque()
+        self._occupy(start)
+        self.body.append(start)
+        self.food_cell = self._place_food()
+
+    def cell(self, x, y):
+        return y * self.cols + x
+
+    def cell_xy(self, cell):
+        y, x = divmod(cell, self.cols)
+        return x, y
+
+    @property
+    def head(self):
+        return self.cell_xy(self.body[-1])
+
+    @property
+    def food(self):
+        return None if self.food_cell is None else self.cell_xy(self.food_cell)
+
+    def segments(self):
+        """(x, y) of every body cell, tail first"""
+        return [self.cell_xy(cell) for cell in self.body]
+
+    def _occupy(self, cell):
+        # Swap-remove the cell from the free list
+        index = self.free_index[cell]
+        last = self.free.pop()
+        if last != cell:
+            self.free[index] = last
+            self.free_index[last] = index
+        self.free_index[cell] = -1
+        self.occupied[cell] = 1
+
+    def _release(self, cell):
+        self.free_index[cell] = len(self.free)
+        self.free.append(cell)
+        self.occupied[cell] = 0
+
+    def _place_food(self):
+        # Sample only free cells; None when the snake fills the grid
+        if not self.free:
+            return None
+        return self.free[self.rng.randrange(len(self.free))]
+
+    def step(self, action=None):
+        """Advance the game by one tick; return True if food was eaten"""
+        if self.game_over:
+            return False
+        if action is not None:
+            self.direction = DIRECTIONS[action]
+
+        dx, dy = self.direction
+        head = self.body[-1]
+        x = head % self.cols + dx
+        y = head // self.cols + dy
+        self.steps += 1
+
+        # Check if the snake hits the boundary of the grid
+        if not (0 <= x < self.cols and 0 <= y < self.rows):
+            self.game_over = True
+            return False
+
+        # Update the snake's body: the tail moves out before the head moves
+        # in, unless the snake is still growing
+        new_head = y * self.cols + x
+        if len(self.body) >= self.length:
+            self._release(self.body.popleft())
+
+        # Check if snake hits itself
+        if self.occupied[new_head]:
+            self.game_over = True
+            return False
+
+        self._occupy(new_head)
+        self.body.append(new_head)
+
+        if new_head == self.food_cell:
+            # Recalculate food's position & update score
+            self.length += 1
+            self.score += 1
+            self.food_cell = self._place_food()
+            if self.food_cell is None:
+                self.game_over = True  # nowhere left to go
+            return True
+        return False
+
+
+def replay(actions, seed=None, cols=80, rows=60):
+    """Run a recorded list of actions (None = no key) and return the game"""
+    game = SnakeGame(cols, rows, seed)
+    for action in actions:
+        if game.game_over:
+            break
+        game.step(action)
+    return game
+
+
+def benchmark(steps=1_000_000, seed=0):
+    """Play random moves headlessly and return steps per second"""
+    game = SnakeGame(seed=seed)
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(steps):
+        if game.game_over:
+            game.reset(rng.random())
+        game.step(rng.choice(ACTIONS) if rng.random() < 0.1 else None)
+    return steps / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    print(f"{benchmark():,.0f} steps/sec")
@@ -1,108 +1,126 @@
 import pygame
-import random
+
+from snake_engine import DOWN, LEFT, RIGHT, UP, SnakeGame
+
 #Initialize pygame
 pygame.init()
- 
+
 # Set up the game window
-window_width = 800
-window_height = 600
+snake_block = 10
+cols, rows = 80, 60
+window_width = cols * snake_block
+window_height = rows * snake_block
 window = pygame.display.set_mode((window_width, window_height))
 pygame.display.set_caption("Snake Game")
- 
-# Create a boolean value to see if game is running
-game_over = False
-score=0
+
 #Create a colour
 white =(255,255,255)
 black=(0,0,0)
 red=(255,0,0)
- 
-#setting co-ordinates for snake
-#Center cordinates
-x1 = window_width / 2
-y1 = window_height / 2
- 
-#change in x and y
-x1_change = 0
-y1_change = 0
- 
-snake_block = 10
-snake_speed= 15
- 
-snake_body=[]
-length_of_snake=1
- 
+
+# Game logic runs in the headless engine, this file only renders it
+game = SnakeGame(cols, rows)
+
+KEY_ACTIONS = {
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+}
+
 #create a clock
 clock = pygame.time.Clock()
- 
- # Set up the initial position of the food
-foodx = round(random.randrange(
-        0, window_width - snake_block) / 10.0) * 10.0
-foody = round(random.randrange(
-        0, window_height - snake_block) / 10.0) * 10.0
- 
- 
- 
-while not game_over:
+
+
+#Font is loaded once, the score text is only re-rendered when it changes
+font_style = pygame.font.SysFont(None, 50)
+score_pos = (10, 10)
+
+
+def render_score(score):
+    return font_style.render("Score: "+str(score),True,white)
+
+
+def cell_rect(cell):
+    x, y = game.cell_xy(cell)
+    return pygame.Rect(x * snake_block, y * snake_block, snake_block, snake_block)
+
+
+def draw_cell(cell):
+    # Paint one grid cell from the current game state, return its rect
+    if game.occupied[cell]:
+        colour = white
+    elif cell == game.food_cell:
+        colour = red
+    else:
+        colour = black
+    rect = cell_rect(cell)
+    pygame.draw.rect(window, colour, rect)
+    return rect
+
+
+def redraw_score_area(area):
+    # Repaint the cells under the score text, then the text on top
+    window.fill(black, area)
+    for y in range(area.top // snake_block, min(rows, (area.bottom - 1) // snake_block + 1)):
+        for x in range(area.left // snake_block, min(cols, (area.right - 1) // snake_block + 1)):
+            cell = game.cell(x, y)
+            if game.occupied[cell] or cell == game.food_cell:
+                draw_cell(cell)
+    window.blit(score_text, score_pos)
+
+
+# First frame: draw everything once
+score = game.score
+score_text = render_score(score)
+score_rect = score_text.get_rect(topleft=score_pos)
+window.fill(black)
+for cell in game.body:
+    draw_cell(cell)
+if game.food_cell is not None:
+    draw_cell(game.food_cell)
+window.blit(score_text, score_pos)
+pygame.display.update()
+
+quit_requested = False
+while not quit_requested and not game.game_over:
     # Check for events such as keypress
+    action = None
     for event in pygame.event.get():
         if event.type==pygame.QUIT:
-            game_over=True
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_LEFT:
-                x1_change = -snake_block
-                y1_change = 0
-            elif event.key == pygame.K_RIGHT:
-                x1_change = snake_block
-                y1_change = 0
-            elif event.key == pygame.K_UP:
-                y1_change = -snake_block
-                x1_change = 0
-            elif event.key == pygame.K_DOWN:
-                y1_change = snake_block
-                x1_change = 0
-            
-    x1+=x1_change
-    y1+=y1_change
-    
-    
-    # Check if the snake hits the boundary of the game window
-    if x1 >= window_width or x1 < 0 or y1 >= window_height or y1 < 0:
-        game_over = True
-            
-            
-    window.fill(black
-                 )
-    pygame.draw.rect(window, red, [foodx,foody,snake_block,snake_block])
-    
-    #update the snake's body
-    snake_head=[]
-    snake_head.append(x1)
-    snake_head.append(y1)
-    snake_body.append(snake_head)
-    
-    if len(snake_body)>length_of_snake:
-        del snake_body[0]
-    
-    #Check if snake hits itself
-    for segment in snake_body[:-1]:
-        if segment == snake_head:
-            game_over=True
-    
-    #Drawing the snake
-    for segment in snake_body:
-        pygame.draw.rect(window,white,[segment[0],segment[1],snake_block,snake_block])
-    
-    #show score code
-    font_style = pygame.font.SysFont(None, 50)
-    score_text = font_style.render("Score: "+str(score),True,white)
-    window.blit(score_text, (10,10))
-    pygame.display.update()
-    
-    if x1 == foodx and y1 == foody:
-        # if this happens, recalculate food's position & update score
-        foodx = round(random.randrange(0, window_width - snake_block) / 10.0) * 10.0
-        foody = round(random.randrange(0, window_height - snake_block) / 10.0) * 10.0
-        length_of_snake+=1
-        score+=1
-    clock.tick(30)
\ No newline at end of file
+            quit_requested=True
+        if event.type == pygame.KEYDOWN and event.key in KEY_ACTIONS:
+            action = KEY_ACTIONS[event.key]
+
+    old_tail = game.body[0]
+    old_head = game.body[-1]
+    old_food = game.food_cell
+    game.step(action)
+
+    # Only repaint the cells that changed this tick (dirty rectangles):
+    # the vacated tail, the new head and the food
+    dirty = []
+    if not game.occupied[old_tail]:
+        dirty.append(draw_cell(old_tail))
+    if game.body[-1] != old_head:
+        dirty.append(draw_cell(game.body[-1]))
+    if game.food_cell != old_food and game.food_cell is not None:
+        dirty.append(draw_cell(game.food_cell))
+
+    if game.score != score:
+        score = game.score
+        score_text = render_score(score)
+        new_score_rect = score_text.get_rect(topleft=score_pos)
+        area = score_rect.union(new_score_rect)
+        score_rect = new_score_rect
+        redraw_score_area(area)
+        dirty.append(area)
+    elif score_rect.collidelist(dirty) != -1:
+        # The snake moved under the score, keep the text on top
+        redraw_score_area(score_rect)
+        dirty.append(score_rect)
+
+    if dirty:
+        pygame.display.update(dirty)
+
+    clock.tick(30)
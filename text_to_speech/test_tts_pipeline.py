@@ -0,0 +1,105 @@
+"""
+Checks for tts_cache and tts_pipeline with the offline StubBackend.
+
+    python -m unittest test_tts_pipeline
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from tts_cache import StubBackend, SynthesisCache, read_manifest, split_sentences
+from tts_pipeline import NullPlayer, SynthesisError, stream_audio
+
+TEXT = ("The first sentence. A second one follows! Is this the third? "
+        "The first sentence.\n\nA new paragraph starts here.")
+
+
+class RecordingPlayer(NullPlayer):
+    def __init__(self):
+        self.sizes = []
+        self.started = self.finished = False
+
+    def start(self, path):
+        self.started = True
+
+    def available(self, size):
+        self.sizes.append(size)
+
+    def finish(self):
+        self.finished = True
+
+
+class StreamAudioTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, "out.mp3")
+        self.cache = SynthesisCache(os.path.join(self.directory, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_pipeline(self, text=TEXT, backend=None, **kwargs):
+        kwargs.setdefault("backoff", 0)
+        return stream_audio(text, self.output, backend=backend or StubBackend(),
+                            cache=self.cache, **kwargs)
+
+    def expected_audio(self, text=TEXT):
+        stub = StubBackend()
+        return b"".join(stub.synthesize(chunk) for chunk in split_sentences(text))
+
+    def test_output_is_in_order(self):
+        player = RecordingPlayer()
+        stats = self.run_pipeline(backend=StubBackend(delay=0.01), player=player)
+        with open(self.output, "rb") as fp:
+            self.assertEqual(fp.read(), self.expected_audio())
+        self.assertEqual(stats["chunks"], 5)
+        self.assertTrue(stats["written"])
+        self.assertTrue(player.started and player.finished)
+        self.assertEqual(player.sizes, sorted(player.sizes))
+        self.assertEqual(player.sizes[-1], os.path.getsize(self.output))
+
+    def test_repeated_sentence_is_synthesized_once(self):
+        backend = StubBackend()
+        stats = self.run_pipeline(backend=backend)
+        self.assertEqual(len(backend.calls), 4)
+        self.assertEqual((stats["synthesized"], stats["cached"]), (4, 1))
+
+    def test_second_run_uses_the_cache(self):
+        self.run_pipeline()
+        backend = StubBackend()
+        stats = self.run_pipeline(backend=backend)
+        self.assertEqual(backend.calls, [])
+        self.assertFalse(stats["written"])
+        self.assertEqual(stats["cached"], 5)
+
+    def test_edit_synthesizes_only_changed_sentences(self):
+        self.run_pipeline()
+        backend = StubBackend()
+        edited = TEXT.replace("third", "3rd")
+        self.run_pipeline(edited, backend=backend)
+        self.assertEqual(backend.calls, ["Is this the 3rd?"])
+        with open(self.output, "rb") as fp:
+            self.assertEqual(fp.read(), self.expected_audio(edited))
+
+    def test_failures_are_retried(self):
+        stats = self.run_pipeline(backend=StubBackend(failures=2), retries=2)
+        self.assertTrue(stats["written"])
+
+    def test_persistent_failure_leaves_no_manifest(self):
+        with self.assertRaises(SynthesisError):
+            self.run_pipeline(backend=StubBackend(failures=3), retries=1)
+        self.assertIsNone(read_manifest(self.output + ".chunks.json"))
+
+    def test_empty_text(self):
+        player = RecordingPlayer()
+        stats = self.run_pipeline("  \n ", player=player)
+        self.assertEqual(stats["chunks"], 0)
+        self.assertIsNone(stats["first_audio"])
+        self.assertFalse(player.started)
+        self.assertFalse(os.path.exists(self.output))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,47 @@
-from gtts import gTTS
-import os
-text= open('input_text.txt','r').read()
-
-language= 'en'
-output=gTTS(text=text,lang=language,slow=False)
-output.save('soundoutput.mp3')
-os.system("start soundoutput.mp3")
\ No newline at end of file
+import argparse
+import shlex
+
+from tts_cache import BACKENDS
+from tts_pipeline import (BACKOFF, RETRIES, WORKERS, NullPlayer, PipePlayer,
+                          SynthesisError, default_player, stream_audio)
+
+parser = argparse.ArgumentParser(description="Read a text file aloud into an MP3")
+parser.add_argument("input", nargs="?", default="input_text.txt")
+parser.add_argument("-o", "--output", default="soundoutput.mp3")
+parser.add_argument("--lang", default="en")
+parser.add_argument("--slow", action="store_true")
+parser.add_argument("--backend", choices=BACKENDS, default="gtts",
+                    help="'stub' writes silent audio without network access")
+parser.add_argument("--workers", type=int, default=WORKERS,
+                    help="sentences synthesized at the same time")
+parser.add_argument("--retries", type=int, default=RETRIES,
+                    help="extra attempts for a sentence that fails")
+parser.add_argument("--player", help="command that plays MP3 data from stdin, "
+                                     "e.g. 'mpv -' (default: mpv, ffplay or mpg123 if "
+                                     "installed, else the system's default application)")
+parser.add_argument("--no-play", action="store_true")
+args = parser.parse_args()
+
+text= open(args.input,'r').read()
+
+if args.no_play:
+    player = NullPlayer()
+elif args.player:
+    player = PipePlayer(shlex.split(args.player))
+else:
+    player = default_player()
+
+# Sentences are synthesized in parallel and cached, playback starts with the first one
+try:
+    stats = stream_audio(text, args.output, lang=args.lang, slow=args.slow,
+                         backend=BACKENDS[args.backend](), player=player,
+                         workers=args.workers, retries=args.retries, backoff=BACKOFF)
+except SynthesisError as error:
+    raise SystemExit(error)
+if stats['chunks']:
+    print(f"{stats['chunks']} sentences: {stats['cached']} cached, "
+          f"{stats['synthesized']} synthesized, first audio after {stats['first_audio']:.2f}s")
+else:
+    print(f"{args.input} has no text to read")
+if isinstance(player, PipePlayer):
+    player.wait()
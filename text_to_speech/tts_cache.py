@@ -0,0 +1,167 @@
+"""
+Sentence-level synthesis cache for text_to_speech.
+
+The text is split into sentences and every sentence is synthesized on
+its own. The MP3 for a sentence is stored in an on-disk cache under the
+SHA-256 of (backend, text, lang, slow), so a document is only sent to the
+speech service once per sentence. After a small edit only the changed
+sentences are synthesized again. tts_pipeline builds the output file
+from the cached chunks, concatenated in order (MP3 frames can simply be
+appended, which is also what gTTS does for long texts).
+
+Backends turn text into MP3 bytes:
+
+- GTTSBackend: Google Translate text-to-speech through gTTS
+- StubBackend: offline stand-in that returns silent MP3 frames, roughly
+  as long as the text would take to read, for tests and dry runs. It
+  can also be made slow and flaky to exercise tts_pipeline.
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tts_cache")
+# Sentences longer than this are split further (at commas, then spaces)
+MAX_CHUNK_CHARS = 500
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|(?<=[.!?][\"')\]])\s+|\n\s*\n")
+_CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+
+
+def split_sentences(text, max_chars=MAX_CHUNK_CHARS):
+    """Split text into sentence chunks of at most max_chars characters
+
+    Whitespace inside a sentence is normalized, so re-wrapping lines does
+    not change the chunks (and does not invalidate the cache).
+    """
+    chunks = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            chunks.append(sentence)
+            continue
+        for clause in _split_long(sentence, max_chars):
+            chunks.append(clause)
+    return chunks
+
+
+def _split_long(sentence, max_chars):
+    # Greedily pack clauses (or words, for very long clauses) into pieces
+    parts = []
+    for clause in _CLAUSE_END.split(sentence):
+        parts.extend([clause] if len(clause) <= max_chars else clause.split(" "))
+    pieces = []
+    current = ""
+    for part in parts:
+        if current and len(current) + 1 + len(part) > max_chars:
+            pieces.append(current)
+            current = part
+        else:
+            current = f"{current} {part}" if current else part
+    if current:
+        pieces.append(current)
+    # A single word longer than max_chars is cut
+    return [piece[i:i + max_chars] for piece in pieces for i in range(0, len(piece), max_chars)]
+
+
+class GTTSBackend:
+    """Synthesize with gTTS (needs network access)"""
+
+    name = "gtts"
+
+    def synthesize(self, text, lang="en", slow=False):
+        from gtts import gTTS  # imported here so the stub works without gTTS
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=lang, slow=slow).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class StubBackend:
+    """Offline backend: silent MPEG-1 Layer III frames, about 15 chars/second
+
+    delay simulates network latency per call, and each text fails with
+    ConnectionError on its first `failures` attempts.
+    """
+
+    name = "stub"
+    # 128 kbit/s, 44.1 kHz, no padding: 417-byte frames of 1152 samples
+    FRAME = b"\xff\xfb\x90\x64" + bytes(413)
+    FRAMES_PER_SECOND = 44100 / 1152
+
+    def __init__(self, delay=0.0, failures=0):
+        self.delay = delay
+        self.failures = failures
+        self.calls = []  # texts synthesized, for tests
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, lang="en", slow=False):
+        with self._lock:
+            self.calls.append(text)
+            attempt = self._attempts[text] = self._attempts.get(text, 0) + 1
+        if self.delay:
+            time.sleep(self.delay)
+        if attempt <= self.failures:
+            raise ConnectionError(f"stub failure {attempt} for {text[:20]!r}")
+        seconds = len(text) / (7.5 if slow else 15)
+        return self.FRAME * max(1, round(seconds * self.FRAMES_PER_SECOND))
+
+
+BACKENDS = {"gtts": GTTSBackend, "stub": StubBackend}
+
+
+class SynthesisCache:
+    """Content-addressed MP3 chunks on disk"""
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+
+    @staticmethod
+    def key(backend, text, lang, slow):
+        payload = json.dumps([backend.name, text, lang, bool(slow)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".mp3")
+
+    def __contains__(self, key):
+        return os.path.exists(self.path(key))
+
+    def store(self, key, audio):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as fp:
+            fp.write(audio)
+        os.replace(tmp_path, path)  # readers never see half a chunk
+
+    def synthesize(self, backend, text, lang="en", slow=False):
+        """Return the cache key for text, synthesizing it only on a miss
+
+        The second value is True when the chunk was already cached.
+        """
+        key = self.key(backend, text, lang, slow)
+        if key in self:
+            return key, True
+        self.store(key, backend.synthesize(text, lang, slow))
+        return key, False
+
+
+def read_manifest(path):
+    """Chunk keys an output file was built from (None if unknown)"""
+    try:
+        with open(path) as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(path, keys):
+    with open(path, "w") as fp:
+        json.dump(keys, fp)
@@ -0,0 +1,232 @@
+"""
+Concurrent synthesis pipeline for text_to_speech.
+
+Sentence chunks (see tts_cache) are synthesized by a bounded thread
+pool: at most `workers` requests run at once and only a few chunks
+ahead of the writer are queued, so book-length input does not pile up
+thousands of pending requests. The chunks are appended to the output
+file strictly in order as soon as each one is ready, and a player is
+told how much of the file is complete, so playback can start after
+the first sentence instead of after the whole document.
+
+A failing chunk is retried with exponential backoff; when it keeps
+failing the run stops with SynthesisError and the output is not marked
+as complete (the next run rebuilds it, reusing every cached chunk).
+
+Players:
+
+- PipePlayer: streams the growing file into mpv, ffplay or mpg123 on
+  stdin (any platform where one of them is installed)
+- OpenFilePlayer: opens the finished file with the system's default
+  application (no streaming)
+- NullPlayer: does nothing (--no-play, tests)
+"""
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from tts_cache import (GTTSBackend, SynthesisCache, read_manifest,
+                       split_sentences, write_manifest)
+
+WORKERS = 4
+RETRIES = 3
+BACKOFF = 1.0
+# Chunks submitted ahead of the one being written, per worker
+QUEUE_AHEAD = 2
+
+PIPE_PLAYERS = [
+    ["mpv", "--no-video", "--really-quiet", "-"],
+    ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-"],
+    ["mpg123", "-q", "-"],
+]
+
+
+class SynthesisError(RuntimeError):
+    """A chunk could not be synthesized, even after retrying"""
+
+
+class NullPlayer:
+    def start(self, path):
+        pass
+
+    def available(self, size):
+        pass
+
+    def finish(self):
+        pass
+
+
+class OpenFilePlayer(NullPlayer):
+    """Open the finished file with the default application"""
+
+    def start(self, path):
+        self.path = path
+
+    def finish(self):
+        if sys.platform == "win32":
+            os.startfile(self.path)
+        elif sys.platform == "darwin":
+            subprocess.Popen(["open", self.path])
+        else:
+            subprocess.Popen(["xdg-open", self.path])
+
+
+class PipePlayer(NullPlayer):
+    """Feed the output file to a command-line player while it is written
+
+    A thread copies each newly completed part of the file to the
+    player's stdin, so the pipeline never waits for playback and memory
+    use does not depend on the length of the text.
+    """
+
+    def __init__(self, command):
+        self.command = command
+        self._size = 0
+        self._done = False
+        self._changed = threading.Condition()
+        self._thread = None
+
+    def start(self, path):
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE,
+                                        stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL)
+        self._thread = threading.Thread(target=self._feed, args=(path,), daemon=True)
+        self._thread.start()
+
+    def available(self, size):
+        with self._changed:
+            self._size = size
+            self._changed.notify()
+
+    def finish(self):
+        with self._changed:
+            self._done = True
+            self._changed.notify()
+
+    def wait(self):
+        """Block until the player has exited"""
+        if self._thread is not None:
+            self._thread.join()
+            self.process.wait()
+
+    def _feed(self, path):
+        sent = 0
+        with open(path, "rb") as fp:
+            while True:
+                with self._changed:
+                    while self._size == sent and not self._done:
+                        self._changed.wait()
+                    size, done = self._size, self._done
+                try:
+                    while sent < size:
+                        data = fp.read(min(size - sent, 1 << 16))
+                        self.process.stdin.write(data)
+                        sent += len(data)
+                    self.process.stdin.flush()
+                except (BrokenPipeError, OSError):
+                    return  # the player was closed
+                if done and sent == size:
+                    break
+        self.process.stdin.close()
+
+
+def default_player():
+    """Stream to the first installed command-line player, else open the file"""
+    for command in PIPE_PLAYERS:
+        if shutil.which(command[0]):
+            return PipePlayer(command)
+    return OpenFilePlayer()
+
+
+def _with_retries(function, retries, backoff, description):
+    for attempt in range(retries + 1):
+        try:
+            return function()
+        # Backends raise whatever their HTTP stack raises, so retry on any error
+        except Exception as error:
+            if attempt == retries:
+                raise SynthesisError(
+                    f"{description} failed after {retries + 1} attempts: {error}") from error
+            time.sleep(backoff * 2 ** attempt)
+
+
+def stream_audio(text, output, lang="en", slow=False, backend=None, cache=None,
+                 player=None, workers=WORKERS, retries=RETRIES, backoff=BACKOFF):
+    """Synthesize text into output concurrently, playing it as it is written
+
+    Returns a dict with the number of chunks, how many were cached and
+    synthesized, whether the output was (re)written and the seconds until
+    the first audio was available (None when the text has no sentences).
+    """
+    backend = backend or GTTSBackend()
+    cache = cache or SynthesisCache()
+    player = player or NullPlayer()
+    started = time.perf_counter()
+    chunks = split_sentences(text)
+    keys = [cache.key(backend, chunk, lang, slow) for chunk in chunks]
+    manifest_path = output + ".chunks.json"
+    stats = {"chunks": len(chunks), "cached": 0, "synthesized": 0,
+             "written": False, "first_audio": None}
+    if not chunks:
+        return stats  # nothing to read: no output, no player
+
+    if os.path.exists(output) and read_manifest(manifest_path) == keys:
+        # Nothing changed since the last run: just play it
+        stats["cached"] = len(chunks)
+        stats["first_audio"] = time.perf_counter() - started
+        player.start(output)
+        player.available(os.path.getsize(output))
+        player.finish()
+        return stats
+
+    if os.path.exists(manifest_path):
+        os.unlink(manifest_path)  # the output is incomplete until the end
+
+    def synthesize(chunk, number):
+        return _with_retries(lambda: cache.synthesize(backend, chunk, lang, slow),
+                             retries, backoff, f"chunk {number} ({chunk[:30]!r})")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, open(output, "wb") as out:
+        player.start(output)
+        futures = {}  # a sentence repeated in the text is synthesized once
+        pending = deque()
+        upcoming = iter(enumerate(chunks, 1))
+        written_keys = set()
+
+        def submit_next():
+            for number, chunk in upcoming:
+                if chunk not in futures:
+                    futures[chunk] = pool.submit(synthesize, chunk, number)
+                pending.append(futures[chunk])
+                return
+
+        for _ in range(workers * QUEUE_AHEAD):
+            submit_next()
+        try:
+            while pending:
+                future = pending.popleft()
+                submit_next()
+                key, cached = future.result()
+                stats["cached" if cached or key in written_keys else "synthesized"] += 1
+                written_keys.add(key)
+                with open(cache.path(key), "rb") as chunk_file:
+                    shutil.copyfileobj(chunk_file, out)
+                out.flush()
+                if stats["first_audio"] is None:
+                    stats["first_audio"] = time.perf_counter() - started
+                player.available(out.tell())
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+        finally:
+            player.finish()
+
+    write_manifest(manifest_path, keys)
+    stats["written"] = True
+    return stats
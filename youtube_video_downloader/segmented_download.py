@@ -0,0 +1,326 @@
+"""
+Segmented, resumable HTTP downloads.
+
+The file is split into parts of PART_SIZE bytes that several worker
+threads fetch with HTTP Range requests, each thread reusing its own
+keep-alive connection. Workers write what they receive straight into
+the destination file at the right offset (os.pwrite), so nothing has to
+be moved or copied afterwards.
+
+Progress is kept in a sidecar file next to the destination
+(<destination>.progress, JSON): the file size, the server's validators
+(ETag / Last-Modified) and how many bytes of each part are on disk. It
+is saved about once a second, after the data itself has been flushed
+with fsync, so an interrupted download picks up where it stopped. The
+sidecar is removed when the download completes. Servers that do not
+support ranges get a plain single-connection download.
+
+Usage:
+    python segmented_download.py URL DESTINATION [-c CONNECTIONS]
+"""
+import http.client
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from urllib.parse import urljoin, urlsplit
+
+CONNECTIONS = 4
+PART_SIZE = 8 << 20
+READ_SIZE = 256 << 10
+RETRIES = 5
+# Seconds before the first retry, doubling up to MAX_BACKOFF
+BACKOFF = 0.5
+MAX_BACKOFF = 10
+SAVE_INTERVAL = 1.0
+TIMEOUT = 30
+MAX_REDIRECTS = 5
+USER_AGENT = "Mozilla/5.0"
+
+
+class DownloadError(Exception):
+    """The download failed (after retrying) or was refused by the server"""
+
+
+class _RetryableStatus(http.client.HTTPException):
+    # 429 and 5xx answers are worth another try
+    pass
+
+
+if hasattr(os, "pwrite"):
+    _pwrite = os.pwrite
+else:  # Windows: no positional writes, serialize seek + write
+    _seek_lock = threading.Lock()
+
+    def _pwrite(fd, data, offset):
+        with _seek_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.write(fd, data)
+
+
+def _retry_later(attempt, error, what):
+    """Back off before another attempt, or give up after RETRIES"""
+    if attempt > RETRIES:
+        raise DownloadError(f"{what} failed: {error}") from error
+    time.sleep(min(BACKOFF * 2 ** (attempt - 1), MAX_BACKOFF))
+
+
+def _write_at(fd, data, offset):
+    view = memoryview(data)
+    while view:
+        written = _pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+class _ConnectionPool:
+    """One keep-alive connection per thread and host"""
+
+    def __init__(self, timeout=TIMEOUT):
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self, parts):
+        connections = self._local.__dict__.setdefault("connections", {})
+        key = (parts.scheme, parts.netloc)
+        if key not in connections:
+            cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+            connections[key] = cls(parts.netloc, timeout=self.timeout)
+        return connections[key]
+
+    def drop(self, url):
+        """Close this thread's connection to url's host (after an error)"""
+        parts = urlsplit(url)
+        connection = self._local.__dict__.get("connections", {}).pop(
+            (parts.scheme, parts.netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def request(self, url, headers=None):
+        """GET url (following redirects); returns (final url, response)"""
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            connection = self._connection(parts)
+            try:
+                connection.request("GET", path, headers={"User-Agent": USER_AGENT, **(headers or {})})
+                response = connection.getresponse()
+            except (http.client.HTTPException, OSError):
+                self.drop(url)
+                raise
+            if response.status in (301, 302, 303, 307, 308):
+                response.read()
+                url = urljoin(url, response.getheader("Location"))
+                continue
+            if response.status == 429 or response.status >= 500:
+                response.read()
+                raise _RetryableStatus(f"HTTP {response.status}")
+            if response.status >= 400:
+                response.read()
+                raise DownloadError(f"HTTP {response.status} {response.reason}")
+            return url, response
+        raise DownloadError("too many redirects")
+
+
+class _Progress:
+    """Bytes done per part, shared by the workers and saved to the sidecar"""
+
+    def __init__(self, state, path, fd, callback):
+        self.state = state
+        self.path = path
+        self.fd = fd
+        self.callback = callback
+        self.done = sum(state["done"])
+        self._lock = threading.Lock()
+        self._saved = time.monotonic()
+
+    def add(self, part, count):
+        with self._lock:
+            self.state["done"][part] += count
+            self.done += count
+            if time.monotonic() - self._saved >= SAVE_INTERVAL:
+                self._save()
+        if self.callback:
+            self.callback(self.done, self.state["size"])
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        os.fsync(self.fd)  # the data must be on disk before the sidecar says so
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as fp:
+            json.dump(self.state, fp)
+        os.replace(tmp_path, self.path)
+        self._saved = time.monotonic()
+
+
+def _probe(pool, url):
+    """Final URL, size, validators and whether byte ranges are supported"""
+    url, response = pool.request(url, {"Range": "bytes=0-0"})
+    validators = {"etag": response.getheader("ETag"),
+                  "last_modified": response.getheader("Last-Modified")}
+    content_range = response.getheader("Content-Range", "")
+    if response.status == 206 and "/" in content_range and not content_range.endswith("/*"):
+        try:
+            response.read()
+        except (http.client.HTTPException, OSError):
+            pool.drop(url)
+            raise
+        return url, int(content_range.rsplit("/", 1)[1]), validators, True
+    # 200: the server sends the whole file, do not read it here
+    pool.drop(url)
+    length = response.getheader("Content-Length")
+    return url, int(length) if length else None, validators, False
+
+
+def _load_state(path, destination, size, part_size, validators):
+    try:
+        with open(path) as fp:
+            state = json.load(fp)
+    except (OSError, ValueError):
+        return None
+    if (state.get("size") != size or state.get("part_size") != part_size
+            or state.get("validators") != validators
+            or not os.path.exists(destination)):
+        return None  # the remote file changed, or the partial file is gone
+    return state
+
+
+def _fetch_part(pool, url, fd, part, start, end, progress, stop):
+    """Download bytes [start, end) of the file into fd, resuming after errors"""
+    attempt = 0
+    while True:
+        offset = start + progress.state["done"][part]
+        if offset >= end or stop.is_set():
+            return
+        try:
+            _, response = pool.request(url, {"Range": f"bytes={offset}-{end - 1}"})
+            if response.status != 206:
+                pool.drop(url)
+                raise DownloadError(f"server ignored the range request (HTTP {response.status})")
+            while offset < end:
+                if stop.is_set():
+                    pool.drop(url)  # the rest of the body is not read
+                    return
+                data = response.read(min(READ_SIZE, end - offset))
+                if not data:
+                    raise http.client.IncompleteRead(b"", end - offset)
+                _write_at(fd, data, offset)
+                offset += len(data)
+                progress.add(part, len(data))
+        except (http.client.HTTPException, OSError) as error:
+            pool.drop(url)
+            attempt += 1
+            _retry_later(attempt, error, f"part {part}")
+
+
+def _download_whole(pool, url, destination, progress, stop):
+    # No range support: one stream, no resume, a broken stream starts over
+    attempt = 0
+    while True:
+        try:
+            _, response = pool.request(url)
+            length = response.getheader("Content-Length")
+            total = int(length) if length else None
+            done = 0
+            with open(destination, "wb") as fp:
+                while not stop.is_set():
+                    data = response.read(READ_SIZE)
+                    if not data:
+                        break
+                    fp.write(data)
+                    done += len(data)
+                    if progress:
+                        progress(done, total or 0)
+            # read() returns b"" when the connection drops mid-body
+            if total is not None and done < total and not stop.is_set():
+                raise http.client.IncompleteRead(b"", total - done)
+            pool.drop(url)
+            return done
+        except (http.client.HTTPException, OSError) as error:
+            pool.drop(url)
+            attempt += 1
+            _retry_later(attempt, error, "download")
+
+
+def download(url, destination, connections=CONNECTIONS, part_size=PART_SIZE,
+             progress=None, cancel=None):
+    """Download url into destination; returns the size in bytes
+
+    progress(done, total) is called from the worker threads. Setting
+    the threading.Event cancel stops the download, keeping the sidecar
+    so that it can be resumed later.
+    """
+    pool = _ConnectionPool()
+    stop = cancel or threading.Event()
+    attempt = 0
+    while True:
+        try:
+            url, size, validators, ranges = _probe(pool, url)
+            break
+        except (http.client.HTTPException, OSError) as error:
+            attempt += 1
+            _retry_later(attempt, error, "probe")
+    if not ranges or size is None:
+        return _download_whole(pool, url, destination, progress, stop)
+
+    sidecar = destination + ".progress"
+    parts = max(1, -(-size // part_size))
+    state = _load_state(sidecar, destination, size, part_size, validators) or {
+        "url": url, "size": size, "part_size": part_size,
+        "validators": validators, "done": [0] * parts}
+
+    fd = os.open(destination, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o666)
+    tracker = _Progress(state, sidecar, fd, progress)
+    try:
+        if os.fstat(fd).st_size != size:
+            os.ftruncate(fd, size)  # sparse file, parts fill it in any order
+        tracker.save()
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            futures = [
+                executor.submit(_fetch_part, pool, url, fd, part,
+                                part * part_size, min(size, (part + 1) * part_size),
+                                tracker, stop)
+                for part in range(parts)
+                if state["done"][part] < min(part_size, size - part * part_size)]
+            try:
+                finished, _ = wait(futures, return_when=FIRST_EXCEPTION)
+                failed = [future for future in finished if future.exception()]
+                if failed:
+                    raise failed[0].exception()
+            except BaseException:
+                stop.set()  # let the other workers stop at their next read
+                raise
+    finally:
+        tracker.save()
+        os.close(fd)
+    if tracker.done < size:
+        return tracker.done  # cancelled, the sidecar allows resuming
+    os.unlink(sidecar)
+    return size
+
+
+def main():
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description="Segmented, resumable download")
+    parser.add_argument("url")
+    parser.add_argument("destination")
+    parser.add_argument("-c", "--connections", type=int, default=CONNECTIONS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    def show(done, total):
+        sys.stdout.write(f"\r{done / max(total, 1):6.1%}  {done:,} / {total:,} bytes")
+
+    size = download(args.url, args.destination, args.connections, progress=show)
+    elapsed = time.perf_counter() - start
+    print(f"\n{size:,} bytes in {elapsed:.1f}s ({size / elapsed / 1e6:.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
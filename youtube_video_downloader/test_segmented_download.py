@@ -0,0 +1,163 @@
+"""
+Checks for segmented_download against a local HTTP server.
+
+    python -m unittest test_segmented_download
+
+The server answers Range requests (or ignores them), can cut responses
+short and can answer 503 a few times, so downloads, resuming and
+retries run without network access.
+"""
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import segmented_download
+
+DATA = os.urandom(5 * 1024 * 1024 + 123)
+PART_SIZE = 512 * 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionError:
+            pass  # the client dropped the connection on purpose
+
+    def do_GET(self):
+        server = self.server
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/file")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        with server.lock:
+            server.requests += 1
+            unavailable = server.unavailable > 0
+            server.unavailable -= unavailable
+            cut = server.cut > 0
+            server.cut -= cut
+        if unavailable:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if match and server.ranges:
+            start, end = int(match[1]), int(match[2])
+            body = DATA[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(DATA)}")
+        else:
+            body = DATA
+            self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if cut:
+            self.wfile.write(body[:len(body) // 3])
+            self.close_connection = True
+        else:
+            self.wfile.write(body)
+
+
+class SegmentedDownloadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/redirect"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        patcher = mock.patch.object(segmented_download, "BACKOFF", 0)  # retry at once
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server.ranges = True
+        self.server.cut = 0
+        self.server.unavailable = 0
+        self.server.requests = 0
+        self.directory = tempfile.mkdtemp()
+        self.destination = os.path.join(self.directory, "video.mp4")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertDownloaded(self):
+        with open(self.destination, "rb") as fp:
+            self.assertEqual(hashlib.sha256(fp.read()).digest(), hashlib.sha256(DATA).digest())
+        self.assertFalse(os.path.exists(self.destination + ".progress"))
+
+    def download(self, **kwargs):
+        return segmented_download.download(self.url, self.destination,
+                                           part_size=PART_SIZE, **kwargs)
+
+    def test_download(self):
+        self.assertEqual(self.download(), len(DATA))
+        self.assertDownloaded()
+
+    def test_resume(self):
+        cancel = threading.Event()
+
+        def stop_halfway(done, total):
+            if done > total // 2:
+                cancel.set()
+
+        done = self.download(progress=stop_halfway, cancel=cancel)
+        self.assertLess(done, len(DATA))
+        self.assertTrue(os.path.exists(self.destination + ".progress"))
+
+        resumed_from = []
+        self.download(progress=lambda done, total: resumed_from.append(done))
+        self.assertGreater(resumed_from[0], len(DATA) // 2)
+        self.assertDownloaded()
+
+    def test_broken_connections_are_retried(self):
+        self.server.cut = 4
+        self.download()
+        self.assertDownloaded()
+
+    def test_unavailable_probe_is_retried(self):
+        self.server.unavailable = 2
+        self.download()
+        self.assertDownloaded()
+
+    def test_without_ranges(self):
+        self.server.ranges = False
+        self.assertEqual(self.download(), len(DATA))
+        self.assertDownloaded()
+
+    def test_short_body_without_ranges_is_retried(self):
+        self.server.ranges = False
+        self.server.cut = 2
+        self.assertEqual(self.download(), len(DATA))
+        self.assertDownloaded()
+
+    def test_short_body_without_ranges_fails(self):
+        self.server.ranges = False
+        self.server.cut = segmented_download.RETRIES + 2
+        with self.assertRaises(segmented_download.DownloadError):
+            self.download()
+
+
+if __name__ == "__main__":
+    unittest.main()
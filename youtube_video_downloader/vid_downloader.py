@@ -1,42 +1,64 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from pytubefix import YouTube
-import shutil
 import os
+import queue
+import threading
 
-def download():
+from segmented_download import download as segmented_download
+
+# Download thread -> Tk: ("progress", done, total), ("done", path) or ("error", message)
+events = queue.Queue()
+
+def download_worker(video_path, file_path):
     try:
-        video_path = enter_url.get().strip()
-        file_path = path_label.cget("text")
-        
-        # Validation
-        if not video_path:
-            messagebox.showerror("Error", "Please enter a video URL")
-            return
-        
-        if file_path == "Select path to download":
-            messagebox.showerror("Error", "Please select a download path")
-            return
-        
-        # Download video
-        download_button.config(state='disabled', text='DOWNLOADING...')
-        root.update()
-        
-        yt = YouTube(video_path)
-        mp4 = yt.streams.get_highest_resolution().download()
-        
-        # Move to selected directory
-        filename = os.path.basename(mp4)
-        destination = os.path.join(file_path, filename)
-        shutil.move(mp4, destination)
-        
-        messagebox.showinfo("Success", f"Download complete!\nSaved to: {destination}")
-        print("download_complete")
-        
+        stream = YouTube(video_path).streams.get_highest_resolution()
+        # Written straight into the selected directory, resuming a previous attempt
+        destination = os.path.join(file_path, stream.default_filename)
+        segmented_download(stream.url, destination,
+                           progress=lambda done, total: events.put(("progress", done, total)))
+        events.put(("done", destination))
     except Exception as e:
-        messagebox.showerror("Error", f"Download failed: {str(e)}")
-    finally:
+        events.put(("error", str(e)))
+
+def poll_download():
+    progress = None
+    while True:
+        try:
+            event = events.get_nowait()
+        except queue.Empty:
+            break
+        if event[0] == "progress":
+            progress = event  # only the latest one is shown
+            continue
         download_button.config(state='normal', text='DOWNLOAD')
+        if event[0] == "done":
+            messagebox.showinfo("Success", f"Download complete!\nSaved to: {event[1]}")
+            print("download_complete")
+        else:
+            messagebox.showerror("Error", f"Download failed: {event[1]}")
+        return
+    if progress and progress[2]:
+        download_button.config(text=f'DOWNLOADING... {progress[1] * 100 // progress[2]}%')
+    root.after(100, poll_download)
+
+def download():
+    video_path = enter_url.get().strip()
+    file_path = path_label.cget("text")
+
+    # Validation
+    if not video_path:
+        messagebox.showerror("Error", "Please enter a video URL")
+        return
+
+    if file_path == "Select path to download":
+        messagebox.showerror("Error", "Please select a download path")
+        return
+
+    # Download video in the background, the window stays responsive
+    download_button.config(state='disabled', text='DOWNLOADING...')
+    threading.Thread(target=download_worker, args=(video_path, file_path), daemon=True).start()
+    root.after(100, poll_download)
 
 def getPath():
     path = filedialog.askdirectory()